@@ -5,21 +5,95 @@ intentionally lightweight: network calls are best-effort and persisted
 data lives in `data/`.
 """
 
+import argparse
+import atexit
+import functools
+import json
+import queue
 import random
+import re
+import signal
+import sys
+import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
-from typing import Optional
+from typing import Callable, List, Optional
 
 import requests
+try:
+    import orjson
+except ImportError:  # optional, faster JSON encoding
+    orjson = None
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from multilingual_system import MultilingualSystem
+from multilingual_system import MultilingualSystem, NormalizedInput
 from internet_learning import InternetLearningSystem
 from learning_system import LearningSystem
 from memory import MemoryManager
 
+# Batch mode (--batch): most turns sent to Ollama together, and how long to
+# wait for more input after the first line of a batch arrives
+BATCH_MAX = 8
+BATCH_WINDOW_MS = 20
+
+# Inputs that end the chat session
+QUIT_WORDS = frozenset(['quit', 'exit', 'bye'])
+
+def create_http_session() -> requests.Session:
+    """Build a keep-alive session with a small connection pool and retries.
+
+    The pool holds a connection for every request of a full batch, so
+    concurrent batch turns never discard and reopen connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=BATCH_MAX,
+        max_retries=Retry(total=2, backoff_factor=0.1),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+def dump_json(obj) -> bytes:
+    """Encode `obj` as UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+def load_json(data: bytes):
+    """Decode UTF-8 JSON bytes without an intermediate str when orjson is available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def compile_intents(intents: dict) -> re.Pattern:
+    """Compile intent keyword lists into one case-insensitive pattern.
+
+    Each intent becomes a named group, so a single `finditer` pass over the
+    input reports every intent it mentions via `match.lastgroup`. Keywords in
+    scripts written without spaces (Japanese, Chinese) match anywhere; all
+    others must match whole words.
+    """
+    groups = []
+    for intent, keywords in intents.items():
+        alternatives = []
+        for keyword in keywords:
+            escaped = re.escape(keyword)
+            if any('\u3040' <= ch <= '\u9fff' for ch in keyword):
+                alternatives.append(escaped)
+            else:
+                alternatives.append(rf"\b{escaped}\b")
+        groups.append(f"(?P<{intent}>{'|'.join(alternatives)})")
+    return re.compile("|".join(groups), re.IGNORECASE)
+
 class KikiAI:
-    def __init__(self):
-        self.name = "Tomoka"
+    def __init__(self, name: str = "Tomoka"):
+        self.name = name
         self.personality = {
             "traits": [
                 "curious", "intelligent", "multilingual", "helpful", 
@@ -49,25 +123,104 @@ class KikiAI:
         }
         # Centralized memory manager
         self.memory_mgr = MemoryManager()
+        # Last 3 exchanges, pre-formatted for the prompt context
+        self._recent_ctx = deque(
+            (self._format_exchange(mem['user'], mem['neuro']) for mem in self.memory_mgr.get_recent(3)),
+            maxlen=3,
+        )
         self.ollama_url = "http://localhost:11434/api/generate"
+        # Tiny fixed response, used to check that Ollama is up
+        self.ollama_version_url = self.ollama_url.replace('/api/generate', '/api/version')
+        self.model = "llama3.2:1b"
+        # How long Ollama keeps the model loaded between turns
+        self.keep_alive = "30m"
+        # Streamed replies are cut off client-side after this many chunks
+        self.max_response_tokens = 200
+        # Seconds to connect to Ollama, and to wait between streamed chunks
+        self.request_timeout = (3, 60)
+        # Set (e.g. by Ctrl+C) to abandon the reply currently streaming
+        self._cancel = threading.Event()
+
+        # Shared HTTP session so Ollama calls reuse pooled keep-alive connections
+        self.http = create_http_session()
+        atexit.register(self.http.close)
         
         # Initialize advanced systems
         self.multilingual = MultilingualSystem()
         self.internet_learning = InternetLearningSystem()
         self.learning_system = LearningSystem()
+        # Relevant-fact lookups keyed on the normalised query; cleared whenever
+        # internet learning may have added knowledge
+        self._relevant_facts_cached = functools.lru_cache(maxsize=256)(self.internet_learning.get_relevant_facts)
         
         # User preferences
         self.user_language = 'english'
         self.auto_translate = True
         self.internet_learning_enabled = True
-        
-    def add_to_memory(self, user_input: str, response: str) -> None:
-        """Add conversation to memory."""
-        self.memory_mgr.add(user_input, response)
-    
-    def get_personality_context(self) -> str:
-        """Get context for AI personality."""
-        context = f"""You are {self.name}, an AI assistant with the following personality traits: {', '.join(self.personality['traits'])}.
+        # Seconds to wait for the first token before showing "*typing...*"
+        self.typing_indicator_delay = 0.2
+
+        # Replies are generated here while the chat loop waits on them
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='generate')
+
+        # Console state for the typing indicator, shared with the generating thread
+        self._console_lock = threading.Lock()
+        self._typing_active = False
+        self._typing_shown = False
+        self._typing_bytes = b"*typing...*"
+        self._typing_clear_bytes = ("\r" + " " * (len(self.name) + 14) + f"\r{self.name}: ").encode()
+
+        # Intent detector, compiled once and matched in a single pass per turn
+        self._intent_re = compile_intents({
+            "greet": ["hello", "hi", "hey", "greetings", "hola", "bonjour", "hallo", "こんにちは", "你好"],
+            "bye": ["bye", "goodbye", "see you", "farewell", "adiós", "au revoir", "auf wiedersehen", "さようなら", "再见"],
+            "status": ["status", "diagnose", "health"],
+            "question": ["what", "how", "why", "when", "where", "who", "tell me about", "explain"],
+        })
+
+        # Ollama request pieces that never change between turns
+        self._req_headers = {"Content-Type": "application/json"}
+        self._stop_tokens = ["User:", f"{self.name}:"]
+        self._req_options = {
+            "temperature": 0.8,
+            "max_tokens": 200,
+            # Ollama's own length cap; it ignores max_tokens
+            "num_predict": self.max_response_tokens,
+            "stop": self._stop_tokens
+        }
+        # Everything in a generate request but the prompt, encoded once;
+        # each turn only encodes its prompt and splices it in
+        self._req_body_head = dump_json({
+            "model": self.model,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": self._req_options
+        })[:-1] + b',"prompt":'
+        # Prompt tail that hands the turn to the assistant
+        self._name_suffix = f"\n{self.name}:"
+
+        # Translations of the fixed English replies, keyed by (text, language)
+        self._translation_cache = {}
+
+        # Model replies keyed by (normalised input, user language); least
+        # recently used entries are dropped beyond response_cache_size
+        self._response_cache = OrderedDict()
+        self.response_cache_size = 1024
+
+        # Per-instance RNG and immutable copies of the canned replies used per turn
+        self._rng = random.Random()
+        responses = self.personality["responses"]
+        self._catchphrases = tuple(self.personality["catchphrases"])
+        self._greetings = tuple(responses["greeting"])
+        self._goodbyes = tuple(responses["goodbye"])
+        self._confusions = tuple(responses["confusion"])
+        # 30% chance of flair, spread evenly over the catchphrases; "" means none
+        self._flair_choices = self._catchphrases + ("",)
+        self._flair_weights = (0.3 / len(self._catchphrases),) * len(self._catchphrases) + (0.7,)
+
+        # Static prompt headers; only the per-turn tail is built in the context methods
+        traits = ', '.join(self.personality['traits'])
+        self._ctx_prefix = f"""You are {self.name}, an AI assistant with the following personality traits: {traits}.
         
 You should be:
 - Curious and eager to learn
@@ -80,18 +233,9 @@ You should be:
 
 Recent conversation context:
 """
+        self._enhanced_ctx_prefix = f"""You are {self.name}, a multilingual AI assistant with internet learning capabilities.
         
-        # Add recent memory context
-        for mem in self.memory_mgr.get_recent(3):  # Last 3 conversations
-            context += f"User: {mem['user']}\n{self.name}: {mem['neuro']}\n"
-        
-        return context
-    
-    def get_enhanced_personality_context(self, detected_language: str, internet_knowledge: Optional[dict] = None, relevant_facts: Optional[list] = None) -> str:
-        """Get enhanced context with internet knowledge and language info."""
-        context = f"""You are {self.name}, a multilingual AI assistant with internet learning capabilities.
-        
-Personality traits: {', '.join(self.personality['traits'])}
+Personality traits: {traits}
         
 You should be:
 - Curious and eager to learn from the internet
@@ -101,81 +245,116 @@ You should be:
 - Always ready to search for new information
 - Knowledgeable but humble about your learning
         
-Detected user language: {detected_language}
-        """
+"""
+        # Enhanced header with the language line appended, per language
+        self._enhanced_ctx_headers = {}
+        
+    def _format_exchange(self, user_input: str, response: str) -> str:
+        return f"User: {user_input}\n{self.name}: {response}\n"
+
+    def add_to_memory(self, user_input: str, response: str) -> None:
+        """Add conversation to memory."""
+        self.memory_mgr.add(user_input, response)
+        self._recent_ctx.append(self._format_exchange(user_input, response))
+    
+    def get_personality_context(self) -> str:
+        """Get context for AI personality."""
+        return self._ctx_prefix + "".join(self._recent_ctx)
+    
+    def get_enhanced_personality_context(self, detected_language: str, internet_knowledge: Optional[dict] = None, relevant_facts: Optional[list] = None) -> str:
+        """Get enhanced context with internet knowledge and language info."""
+        header = self._enhanced_ctx_headers.get(detected_language)
+        if header is None:
+            header = f"{self._enhanced_ctx_prefix}Detected user language: {detected_language}\n        "
+            self._enhanced_ctx_headers[detected_language] = header
+        parts = [header]
         
         # Add internet knowledge if available
         if internet_knowledge and internet_knowledge.get('facts'):
-            context += "\nRecent internet knowledge:\n"
+            parts.append("\nRecent internet knowledge:\n")
             for fact in internet_knowledge['facts'][:3]:  # Top 3 facts
-                context += f"- {fact['fact']}\n"
+                parts.append(f"- {fact['fact']}\n")
         
         # Add relevant facts from previous learning
         if relevant_facts:
-            context += "\nRelevant knowledge from previous learning:\n"
+            parts.append("\nRelevant knowledge from previous learning:\n")
             for fact in relevant_facts[:2]:  # Top 2 relevant facts
-                context += f"- {fact['fact']}\n"
+                parts.append(f"- {fact['fact']}\n")
         
-        # Add recent memory context
-        context += "\nRecent conversation context:\n"
-        for mem in self.memory_mgr.get_recent(3):  # Last 3 conversations
-            context += f"User: {mem['user']}\n{self.name}: {mem['neuro']}\n"
+        # Add recent memory context (last 3 conversations)
+        parts.append("\nRecent conversation context:\n")
+        parts.extend(self._recent_ctx)
         
-        return context
-
-    def get_status(self) -> str:
-        """Return a concise status summary about the bot and its subsystems."""
-        status_lines = []
+        return "".join(parts)
 
-        # Basic identity
-        status_lines.append(f"Name: {self.name}")
-
-        # Ollama health
+    def _probe_llm(self) -> List[str]:
+        """Check that the Ollama server answers."""
         try:
-            resp = requests.get(self.ollama_url.replace('/api/generate', '/api/tags'), timeout=5)
-            if resp.status_code == 200:
-                status_lines.append("LLM: reachable")
-            else:
-                status_lines.append(f"LLM: unreachable (status {resp.status_code})")
+            resp = self.http.get(self.ollama_version_url, timeout=1)
+            if resp.ok:
+                return ["LLM: reachable"]
+            return [f"LLM: unreachable (status {resp.status_code})"]
         except Exception as e:
-            status_lines.append(f"LLM: unreachable ({e})")
+            return [f"LLM: unreachable ({e})"]
 
-        # Internet access quick check
+    def _probe_internet(self) -> List[str]:
+        """Quick internet access check against DuckDuckGo."""
         try:
-            r = requests.get("https://api.duckduckgo.com/", timeout=5)
+            r = self.http.get("https://api.duckduckgo.com/", timeout=5)
             if r.status_code == 200:
-                status_lines.append("Internet: reachable")
-            else:
-                status_lines.append(f"Internet: reachable but DDG returned {r.status_code}")
+                return ["Internet: reachable"]
+            return [f"Internet: reachable but DDG returned {r.status_code}"]
         except Exception as e:
-            status_lines.append(f"Internet: unreachable ({e})")
+            return [f"Internet: unreachable ({e})"]
 
-        # Subsystem stats
+    def _probe_vocabulary(self) -> List[str]:
         try:
             vocab_stats = self.learning_system.get_vocabulary_stats()
-            status_lines.append(f"Vocabulary words: {vocab_stats.get('total_words')}")
+            return [f"Vocabulary words: {vocab_stats.get('total_words')}"]
         except Exception:
-            status_lines.append("Vocabulary: error retrieving stats")
+            return ["Vocabulary: error retrieving stats"]
 
+    def _probe_internet_learning(self) -> List[str]:
         try:
             internet_stats = self.internet_learning.get_learning_stats()
-            status_lines.append(f"Learned topics: {internet_stats.get('total_topics')}")
+            return [f"Learned topics: {internet_stats.get('total_topics')}"]
         except Exception:
-            status_lines.append("InternetLearning: error retrieving stats")
+            return ["InternetLearning: error retrieving stats"]
 
+    def _probe_languages(self) -> List[str]:
         try:
             lang_stats = self.multilingual.get_language_stats()
-            status_lines.append(f"Supported languages: {lang_stats.get('supported_languages')}")
-            status_lines.append(f"Cached translations: {lang_stats.get('cached_translations')}")
+            return [
+                f"Supported languages: {lang_stats.get('supported_languages')}",
+                f"Cached translations: {lang_stats.get('cached_translations')}",
+            ]
         except Exception:
-            status_lines.append("Multilingual: error retrieving stats")
+            return ["Multilingual: error retrieving stats"]
 
-        # Memory
+    def _probe_memory(self) -> List[str]:
         try:
             mem_count = len(self.memory_mgr.to_list())
-            status_lines.append(f"Memory entries: {mem_count}")
+            return [f"Memory entries: {mem_count}"]
         except Exception:
-            status_lines.append("Memory: error")
+            return ["Memory: error"]
+
+    def get_status(self) -> str:
+        """Return a concise status summary about the bot and its subsystems."""
+        # Basic identity
+        status_lines = [f"Name: {self.name}"]
+
+        # Run the independent probes concurrently; map() keeps their order
+        probes = [
+            self._probe_llm,
+            self._probe_internet,
+            self._probe_vocabulary,
+            self._probe_internet_learning,
+            self._probe_languages,
+            self._probe_memory,
+        ]
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            for lines in executor.map(lambda probe: probe(), probes):
+                status_lines.extend(lines)
 
         # Learning enabled flag
         status_lines.append(f"Internet learning enabled: {self.internet_learning_enabled}")
@@ -184,126 +363,364 @@ Detected user language: {detected_language}
         status_lines.append(f"Auto-translate: {self.auto_translate}")
 
         return "\n".join(status_lines)
+
+    def _read_stream(self, response: requests.Response, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Collect a streamed Ollama reply, forwarding tokens as they arrive.
+
+        Stops early once the reply reaches `max_response_tokens` chunks or
+        the turn is cancelled; leaving the response context then drops the
+        connection so Ollama stops generating.
+        """
+        parts = []
+        for line in response.iter_lines():
+            if self._cancel.is_set():
+                break
+            if not line:
+                continue
+            chunk = load_json(line)
+            token = chunk.get('response', '')
+            if token:
+                parts.append(token)
+                if on_token:
+                    on_token(token)
+            if chunk.get('done') or len(parts) >= self.max_response_tokens:
+                break
+        return "".join(parts)
     
-    def generate_response(self, user_input: str) -> str:
-        """Generate response using multilingual and internet learning capabilities."""
+    def warm_up(self) -> None:
+        """Ask Ollama for a one-token reply so the model is loaded before the first turn."""
         try:
-            # Process input with multilingual support
-            multilingual_data = self.multilingual.process_multilingual_input(user_input, self.user_language)
-            detected_language = multilingual_data['detected_language']
-            processed_input = multilingual_data['translated_text']
-            
-            # Check for language-specific greetings/goodbyes
-            user_lower = user_input.lower()
-            if any(word in user_lower for word in ["hello", "hi", "hey", "greetings", "hola", "bonjour", "hallo", "こんにちは", "你好"]):
-                return self.multilingual.get_greeting(detected_language)
-            
-            if any(word in user_lower for word in ["bye", "goodbye", "see you", "farewell", "adiós", "au revoir", "auf wiedersehen", "さようなら", "再见"]):
-                goodbye_response = random.choice(self.personality["responses"]["goodbye"])
-                if detected_language != 'english':
-                    goodbye_response = self.multilingual.translate_text(goodbye_response, detected_language)
-                return goodbye_response
-
-            # Status / diagnostics request
-            if any(word in user_lower for word in ["status", "diagnose", "health", "status update"]):
-                return self.get_status()
-            
-            # Check for internet learning opportunities
-            internet_knowledge = None
-            if self.internet_learning_enabled:
-                # Look for question words or learning opportunities
-                if any(word in user_lower for word in ["what", "how", "why", "when", "where", "who", "tell me about", "explain"]):
-                    internet_knowledge = self.internet_learning.learn_from_query(processed_input)
-            
-            # Get relevant facts from previous internet learning
-            relevant_facts = self.internet_learning.get_relevant_facts(processed_input)
-            
-            # Build enhanced context
-            context = self.get_enhanced_personality_context(detected_language, internet_knowledge, relevant_facts)
-            
-            # Generate response using Ollama
-            prompt = context + f"\nUser: {processed_input}\n{self.name}:"
-            
-            data = {
-                "model": "llama3.2:1b",
-                "prompt": prompt,
+            self.http.post(self.ollama_url, data=dump_json({
+                "model": self.model,
+                "prompt": " ",
                 "stream": False,
-                "options": {
-                    "temperature": 0.8,
-                    "max_tokens": 200,
-                    "stop": ["User:", f"{self.name}:"]
-                }
-            }
-            
-            response = requests.post(self.ollama_url, json=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result.get('response', '').strip()
-                
-                # Add personality flair
-                if random.random() < 0.3:
-                    ai_response += " " + random.choice(self.personality["catchphrases"])
-                
-                # Translate response back to detected language if needed
-                if detected_language != 'english' and self.auto_translate:
-                    ai_response = self.multilingual.translate_text(ai_response, detected_language)
-                
-                # Learn from this conversation
-                self.learning_system.learn_from_conversation(user_input, ai_response)
-                self.multilingual.learn_language_pattern(user_input, detected_language)
-                
-                return ai_response
-            else:
-                # Fallback response
-                fallback = random.choice(self.personality["responses"]["confusion"])
-                if detected_language != 'english':
-                    fallback = self.multilingual.translate_text(fallback, detected_language)
-                return fallback
+                "keep_alive": self.keep_alive,
+                "options": {"num_predict": 1}
+            }), headers=self._req_headers, timeout=60).close()
+        except Exception:
+            # Best effort: the first turn will simply load the model itself
+            pass
+
+    @staticmethod
+    def _should_quit(user_input: str) -> bool:
+        """True if the input asks to end the chat."""
+        return user_input.casefold() in QUIT_WORDS
+
+    def _detect_intents(self, user_input: str) -> set:
+        """Return the names of all intents mentioned in the input."""
+        return {match.lastgroup for match in self._intent_re.finditer(user_input)}
+
+    def _prepare_turn(self, user_input: str):
+        """Analyse the input and build the Ollama request for one turn.
+
+        Returns a finished reply (str) for canned intents, otherwise a dict
+        describing the pending model request.
+        """
+        # Casefold and tokenize once; the cache key, the multilingual step
+        # and the fact lookup all share the result
+        ni = NormalizedInput.from_text(user_input)
+        query = " ".join(ni.lower.split())
+
+        # Repeated inputs reuse the earlier model reply without a request
+        cache_key = (query, self.user_language)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            self._response_cache.move_to_end(cache_key)
+            return cached
+
+        # Process input with multilingual support
+        multilingual_data = self.multilingual.process_multilingual_input(ni, self.user_language)
+        detected_language = multilingual_data['detected_language']
+        processed_input = multilingual_data['translated_text']
+        
+        intents = self._detect_intents(user_input)
+        
+        # Check for language-specific greetings/goodbyes
+        if "greet" in intents:
+            return self.multilingual.get_greeting(detected_language)
+        
+        if "bye" in intents:
+            return self._translate_canned(self._rng.choice(self._goodbyes), detected_language)
+
+        # Status / diagnostics request
+        if "status" in intents:
+            return self.get_status()
+        
+        # Check for internet learning opportunities
+        internet_knowledge = None
+        if self.internet_learning_enabled:
+            # Look for question words or learning opportunities
+            if "question" in intents:
+                internet_knowledge = self.internet_learning.learn_from_query(processed_input)
+                self._relevant_facts_cached.cache_clear()
+        
+        # Get relevant facts from previous internet learning
+        if processed_input is not user_input:
+            query = " ".join(processed_input.casefold().split())
+        relevant_facts = self._relevant_facts_cached(query)
+        
+        # Build enhanced context
+        context = self.get_enhanced_personality_context(detected_language, internet_knowledge, relevant_facts)
+        
+        # Generate response using Ollama
+        prompt = context + f"\nUser: {processed_input}" + self._name_suffix
+        
+        body = self._req_body_head + dump_json(prompt) + b"}"
+        
+        return {
+            'user_input': user_input,
+            'cache_key': cache_key,
+            'detected_language': detected_language,
+            # The model answers in the user's language; translate only when
+            # the input was in another one. Only untranslated replies stream.
+            'needs_translation': detected_language != self.user_language and self.auto_translate,
+            'body': body,
+        }
+
+    def _request_completion(self, turn: dict, on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Send a prepared turn to Ollama; returns None if the server refuses it."""
+        with self.http.post(self.ollama_url, data=turn['body'], headers=self._req_headers,
+                            stream=True, timeout=self.request_timeout) as response:
+            if response.status_code != 200:
+                return None
+            return self._read_stream(response, None if turn['needs_translation'] else on_token).strip()
+
+    def _translate_canned(self, text: str, language: str) -> str:
+        """Translate one of the fixed English replies, at most once per language."""
+        if language == 'english':
+            return text
+        key = (text, language)
+        translated = self._translation_cache.get(key)
+        if translated is None:
+            translated = self.multilingual.translate_text(text, language)
+            self._translation_cache[key] = translated
+        return translated
+
+    def _finish_turn(self, turn: dict, ai_response: Optional[str]) -> str:
+        """Post-process a model reply and learn from the exchange."""
+        detected_language = turn['detected_language']
+        
+        if ai_response is None:
+            # Fallback response
+            return self._translate_canned(self._rng.choice(self._confusions), detected_language)
+        
+        # Add personality flair, unless the reply was cut short
+        flair = self._rng.choices(self._flair_choices, weights=self._flair_weights)[0]
+        if flair and not self._cancel.is_set():
+            ai_response += " " + flair
+        
+        # Translate response back to detected language if needed
+        if turn['needs_translation']:
+            ai_response = self.multilingual.translate_text(ai_response, detected_language)
+        
+        # Learn from this conversation (process_multilingual_input has
+        # already recorded the input's language pattern)
+        self.learning_system.learn_from_conversation(turn['user_input'], ai_response)
+
+        # Only complete replies are reused
+        if not self._cancel.is_set():
+            self._response_cache[turn['cache_key']] = ai_response
+            if len(self._response_cache) > self.response_cache_size:
+                self._response_cache.popitem(last=False)
+        
+        return ai_response
+    
+    def generate_response(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate response using multilingual and internet learning capabilities.
+
+        When `on_token` is given, model tokens are passed to it as they stream
+        in, unless the reply still has to be translated afterwards.
+        """
+        try:
+            turn = self._prepare_turn(user_input)
+            if isinstance(turn, str):
+                return turn
+            return self._finish_turn(turn, self._request_completion(turn, on_token))
                 
         except Exception as e:
             print(f"Error generating response: {e}")
-            fallback = random.choice(self.personality["responses"]["confusion"])
+            fallback = self._rng.choice(self._confusions)
             return fallback
+
+    def generate_responses(self, user_inputs: List[str]) -> List[str]:
+        """Answer several turns at once, overlapping their Ollama requests.
+
+        Inputs are analysed and post-processed in order on the calling thread;
+        only the model calls run concurrently over the shared HTTP session.
+        """
+        turns = []
+        for user_input in user_inputs:
+            try:
+                turns.append(self._prepare_turn(user_input))
+            except Exception as e:
+                print(f"Error generating response: {e}")
+                turns.append(self._rng.choice(self._confusions))
+
+        pending = [turn for turn in turns if isinstance(turn, dict)]
+        completions = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(len(pending), BATCH_MAX)) as executor:
+                futures = {id(turn): executor.submit(self._request_completion, turn) for turn in pending}
+                for key, future in futures.items():
+                    try:
+                        completions[key] = future.result()
+                    except Exception as e:
+                        print(f"Error generating response: {e}")
+                        completions[key] = None
+
+        responses = []
+        for turn in turns:
+            if isinstance(turn, str):
+                responses.append(turn)
+                continue
+            try:
+                responses.append(self._finish_turn(turn, completions[id(turn)]))
+            except Exception as e:
+                print(f"Error generating response: {e}")
+                responses.append(self._rng.choice(self._confusions))
+        return responses
+
+    def _write_console(self, data: bytes) -> None:
+        """Write pre-encoded bytes straight to stdout, bypassing the text codec."""
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is None:
+            sys.stdout.write(data.decode())
+            sys.stdout.flush()
+            return
+        # Keep ordering with anything still queued in the text layer
+        sys.stdout.flush()
+        buffer.write(data)
+        buffer.flush()
+
+    def _show_typing_indicator(self) -> None:
+        with self._console_lock:
+            if self._typing_active:
+                self._write_console(self._typing_bytes)
+                self._typing_shown = True
+
+    def _stop_typing_indicator(self) -> None:
+        """Cancel the indicator and erase it if it was already printed."""
+        with self._console_lock:
+            self._typing_active = False
+            if self._typing_shown:
+                self._write_console(self._typing_clear_bytes)
+                self._typing_shown = False
     
     def chat(self) -> None:
         """Main chat loop."""
         print("=" * 50)
         print(f"{self.name} is online!")
         print("=" * 50)
-        print(random.choice(self.personality["responses"]["greeting"]))
+        print(self._rng.choice(self._greetings))
         print("\nType 'quit' to exit the chat.")
         print("=" * 50)
         
         while True:
             user_input = input("\nYou: ").strip()
             
-            if user_input.lower() in ['quit', 'exit', 'bye']:
-                print(f"\n{self.name}: {random.choice(self.personality['responses']['goodbye'])}")
+            if self._should_quit(user_input):
+                print(f"\n{self.name}: {self._rng.choice(self._goodbyes)}")
                 break
             
             if not user_input:
                 continue
             
-            # Show typing indicator
-            print(f"\n{self.name}: *typing...*", end="", flush=True)
-            time.sleep(1)
-            print("\r" + " " * 20 + "\r", end="", flush=True)  # Clear typing indicator
-            
-            response = self.generate_response(user_input)
-            print(f"{self.name}: {response}")
+            # Print tokens in place as the model streams them
+            print(f"\n{self.name}: ", end="", flush=True)
+            streamed = []
+            self._typing_active = True
+
+            def show_token(token: str) -> None:
+                if not streamed:
+                    token = token.lstrip()
+                    if not token:
+                        return
+                    self._stop_typing_indicator()
+                streamed.append(token)
+                print(token, end="", flush=True)
+
+            # Ctrl+C while a reply streams cancels that reply, not the chat
+            self._cancel.clear()
+            previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: self._cancel.set())
+            try:
+                future = self._pool.submit(self.generate_response, user_input, show_token)
+                try:
+                    response = future.result(timeout=self.typing_indicator_delay)
+                except FutureTimeout:
+                    # Nothing printed yet: show the indicator while waiting
+                    self._show_typing_indicator()
+                    response = future.result()
+            finally:
+                signal.signal(signal.SIGINT, previous_handler)
+            self._stop_typing_indicator()
+            shown = "".join(streamed).strip()
+            if response.startswith(shown):
+                # Finish the line with anything added after streaming (e.g. flair)
+                print(response[len(shown):])
+            else:
+                print(f"\n{self.name}: {response}")
             
             # Add to memory
             self.add_to_memory(user_input, response)
 
-def main() -> None:
+def chat_batch(kiki: KikiAI, stream=sys.stdin) -> None:
+    """Answer line-delimited input, batching lines that arrive close together.
+
+    Meant for scripted clients: a reader thread queues incoming lines and
+    the main thread takes up to BATCH_MAX of them, waiting at most
+    BATCH_WINDOW_MS for more after the first, then answers them together.
+    """
+    lines = queue.Queue()
+
+    def reader() -> None:
+        for line in stream:
+            lines.put(line.strip())
+        lines.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+
+    finished = False
+    while not finished:
+        batch = []
+        item = lines.get()
+        deadline = time.monotonic() + BATCH_WINDOW_MS / 1000
+        while item is not None:
+            if kiki._should_quit(item):
+                finished = True
+                break
+            if item:
+                batch.append(item)
+            if len(batch) >= BATCH_MAX:
+                break
+            try:
+                item = lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+        else:
+            # Reader hit end of input
+            finished = True
+
+        for user_input, response in zip(batch, kiki.generate_responses(batch)):
+            print(f"{kiki.name}: {response}", flush=True)
+            kiki.add_to_memory(user_input, response)
+
+def main(name: str = "Tomoka") -> None:
     """Main function to run the chatbot."""
-    print("Initializing Tomoka AI with multilingual and internet learning capabilities...")
+    parser = argparse.ArgumentParser(description="Run the assistant.")
+    parser.add_argument("--name", default=name, help=f"assistant name (default: {name})")
+    parser.add_argument("--batch", action="store_true",
+                        help="read turns from stdin and batch those arriving together")
+    args = parser.parse_args()
+
+    print(f"Initializing {args.name} AI with multilingual and internet learning capabilities...")
     
+    # Initialize the chatbot first so the startup probe warms its session
+    kiki = KikiAI(name=args.name)
+
     # Check if Ollama is running
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code != 200:
+        response = kiki.http.get(kiki.ollama_version_url, timeout=1)
+        if not response.ok:
             print("⚠️  Ollama server is not running!")
             print("Please start Ollama first by running: ollama serve")
             return
@@ -311,10 +728,15 @@ def main() -> None:
         print("Ollama server is not running!")
         print("Please start Ollama first by running: ollama serve")
         return
+
+    # Load the model in the background while the banner prints and the user types
+    threading.Thread(target=kiki.warm_up, daemon=True).start()
     
-    # Initialize and start chatbot
-    kiki = KikiAI()
-    kiki.chat()
+    # Start chatbot
+    if args.batch:
+        chat_batch(kiki)
+    else:
+        kiki.chat()
 
 if __name__ == "__main__":
     main()
@@ -6,18 +6,75 @@ short facts for local learning. Results are stored under `data/`.
 
 from __future__ import annotations
 
+import functools
 import hashlib
+import itertools
 import json
 import os
 import re
-from collections import defaultdict
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
 from typing import List, Dict, Optional
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON
+    orjson = None
+
+
+_WORD_RE = re.compile(r'\b\w+\b')
+
+
+def _parse_json(data):
+    """Parse JSON from raw bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _to_epoch(value):
+    """Convert a legacy ISO-8601 timestamp to epoch seconds; epochs pass through."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return value
+
+
+def _load_json_file(path):
+    """Read and parse a UTF-8 JSON file."""
+    with open(path, 'rb') as f:
+        return _parse_json(f.read())
+
+
+def _dump_json_file(path, obj):
+    """Atomically write `obj` as compact UTF-8 JSON, encoding with orjson when available."""
+    if orjson is not None:
+        payload = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
 
 class InternetLearningSystem:
+    # Simple fact extraction patterns, fused into one alternation so the
+    # text is scanned once: definitions, origins, life events, dates, places
+    _FACT_RE = re.compile(
+        r'([A-Z][^.!?]*(?:'
+        r'(?:is|are|was|were|will be|has been|have been)'
+        r'|(?:invented|discovered|created|founded|established)'
+        r'|(?:born|died|lived)'
+        r'|(?:\d{4}|\d{1,2}\/\d{1,2}\/\d{4})'
+        r'|(?:located|situated|found)'
+        r')[^.!?]*[.!?])'
+    )
+
     def __init__(self, data_dir="data"):
         self.data_dir = data_dir
         self.knowledge_file = os.path.join(data_dir, "internet_knowledge.json")
@@ -28,9 +85,22 @@ class InternetLearningSystem:
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         
+        # Data files by name -> (path, attribute); only dirty ones are saved
+        self._data_files = {
+            'knowledge': (self.knowledge_file, 'knowledge_base'),
+            'sources': (self.sources_file, 'learning_sources'),
+            'facts': (self.facts_file, 'learned_facts'),
+            'history': (self.search_history_file, 'search_history'),
+        }
+        self._dirty = {name for name, (path, _) in self._data_files.items()
+                       if not os.path.exists(path)}
+        
         # Learning parameters
         self.max_knowledge_entries = 10000
+        self.max_facts_per_topic = 100
         self.max_fact_age_days = 30
+        # Wikipedia summaries kept for ETag revalidation, least recently used dropped
+        self.max_wiki_cache_entries = 1000
         self.min_source_reliability = 0.5
         
         # Headers for web requests
@@ -38,6 +108,13 @@ class InternetLearningSystem:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+        # Pooled keep-alive session shared by DuckDuckGo and Wikipedia lookups
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        
         # Trusted sources for learning (must be defined before loading sources)
         self.trusted_sources = {
             'wikipedia.org': 0.9,
@@ -53,29 +130,62 @@ class InternetLearningSystem:
             'github.com': 0.7
         }
         
+        # Inverted index of topic query words -> topic keys, for get_relevant_facts
+        self._word_topics = defaultdict(set)
+        # Insertion rank per indexed topic, to order candidates deterministically
+        self._topic_rank = {}
+        self._topic_counter = itertools.count()
+        # Fact hashes per topic, filled lazily by learn_from_search_results
+        self._fact_hashes = {}
+        
         # Initialize data structures
         self.knowledge_base = self.load_knowledge_base()
         self.learning_sources = self.load_learning_sources()
         self.learned_facts = self.load_learned_facts()
         self.search_history = self.load_search_history()
+        
+        for topic_key, topic in self.knowledge_base['topics'].items():
+            self._index_topic(topic_key, topic['query'])
+        
+        # Registered domain -> reliability, for get_source_reliability
+        self._build_reliability_index()
+        
+        # Running totals for get_learning_stats
+        self._recount_stats()
     
     def load_knowledge_base(self):
         """Load internet knowledge base"""
         if os.path.exists(self.knowledge_file):
-            with open(self.knowledge_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            knowledge_base = _load_json_file(self.knowledge_file)
+            # Re-key topics saved under an older key scheme (MD5 prefixes)
+            knowledge_base['topics'] = {
+                self.generate_topic_key(topic['query']): topic
+                for topic in knowledge_base.get('topics', {}).values()
+            }
+            # Older files stored ISO strings; timestamps are now epoch seconds
+            for topic in knowledge_base['topics'].values():
+                topic['last_updated'] = _to_epoch(topic['last_updated'])
+                # Sources are unique per URL; collapse older repeated entries
+                topic['sources'] = list({s['url']: s for s in topic['sources']}.values())
+                for fact in topic['facts']:
+                    fact['extracted_at'] = _to_epoch(fact['extracted_at'])
+            wiki_cache = OrderedDict(knowledge_base.get('wiki_cache', {}))
+            while len(wiki_cache) > self.max_wiki_cache_entries:
+                wiki_cache.popitem(last=False)
+            knowledge_base['wiki_cache'] = wiki_cache
+            return knowledge_base
         return {
             'topics': {},
             'facts': {},
             'concepts': {},
-            'recent_updates': []
+            'recent_updates': [],
+            'wiki_cache': OrderedDict()
         }
     
     def load_learning_sources(self):
         """Load learning sources configuration"""
         if os.path.exists(self.sources_file):
-            with open(self.sources_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_json_file(self.sources_file)
         return {
             'preferred_sources': list(self.trusted_sources.keys()),
             'blocked_sources': [],
@@ -86,83 +196,39 @@ class InternetLearningSystem:
     def load_learned_facts(self):
         """Load learned facts from internet"""
         if os.path.exists(self.facts_file):
-            with open(self.facts_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_json_file(self.facts_file)
         return {}
     
     def load_search_history(self):
         """Load search history"""
         if os.path.exists(self.search_history_file):
-            with open(self.search_history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            search_history = _load_json_file(self.search_history_file)
+            for search in search_history:
+                search['timestamp'] = _to_epoch(search['timestamp'])
+            return search_history
         return []
     
     def save_all_data(self):
-        """Save all learning data"""
-        with open(self.knowledge_file, 'w', encoding='utf-8') as f:
-            json.dump(self.knowledge_base, f, ensure_ascii=False, indent=2)
-        
-        with open(self.sources_file, 'w', encoding='utf-8') as f:
-            json.dump(self.learning_sources, f, ensure_ascii=False, indent=2)
-        
-        with open(self.facts_file, 'w', encoding='utf-8') as f:
-            json.dump(self.learned_facts, f, ensure_ascii=False, indent=2)
-        
-        with open(self.search_history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.search_history, f, ensure_ascii=False, indent=2)
+        """Save learning data that changed since the last save"""
+        for name in self._dirty:
+            path, attr = self._data_files[name]
+            _dump_json_file(path, getattr(self, attr))
+        self._dirty.clear()
     
     def search_internet(self, query, num_results=5):
         """Search the internet using DuckDuckGo Instant Answer API"""
-        search_results = []
-        
         # Record search
         self.search_history.append({
             'query': query,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.time(),
             'results_found': 0
         })
+        self._dirty.add('history')
         
         try:
-            # Use DuckDuckGo Instant Answer API
-            ddg_url = f"https://api.duckduckgo.com/"
-            params = {
-                'q': query,
-                'format': 'json',
-                'pretty': 1,
-                'no_html': 1,
-                'skip_disambig': 1
-            }
-            
-            response = requests.get(ddg_url, params=params, headers=self.headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract instant answer
-                if data.get('Abstract'):
-                    search_results.append({
-                        'title': data.get('Heading', 'Unknown'),
-                        'content': data.get('Abstract', ''),
-                        'source': data.get('AbstractSource', 'DuckDuckGo'),
-                        'url': data.get('AbstractURL', ''),
-                        'reliability': self.get_source_reliability(data.get('AbstractURL', '')),
-                        'type': 'instant_answer'
-                    })
-                
-                # Extract related topics
-                if data.get('RelatedTopics'):
-                    for topic in data.get('RelatedTopics', [])[:3]:
-                        if isinstance(topic, dict) and topic.get('Text'):
-                            search_results.append({
-                                'title': topic.get('Text', '')[:100],
-                                'content': topic.get('Text', ''),
-                                'source': 'DuckDuckGo',
-                                'url': topic.get('FirstURL', ''),
-                                'reliability': 0.6,
-                                'type': 'related_topic'
-                            })
+            search_results = self._search_duckduckgo(query)
             
-            # Try Wikipedia API as backup
+            # Try Wikipedia API as backup, only when DuckDuckGo has nothing
             if len(search_results) == 0:
                 search_results.extend(self.search_wikipedia(query))
             
@@ -176,121 +242,210 @@ class InternetLearningSystem:
             print(f"Search error: {e}")
             return []
     
+    def _search_duckduckgo(self, query):
+        """Query the DuckDuckGo Instant Answer API"""
+        search_results = []
+        
+        # Use DuckDuckGo Instant Answer API
+        ddg_url = f"https://api.duckduckgo.com/"
+        params = {
+            'q': query,
+            'format': 'json',
+            'no_html': 1,
+            'skip_disambig': 1
+        }
+        
+        response = self._session.get(ddg_url, params=params, timeout=10)
+        
+        if response.status_code == 200:
+            data = _parse_json(response.content)
+            
+            # Extract instant answer
+            if data.get('Abstract'):
+                search_results.append({
+                    'title': data.get('Heading', 'Unknown'),
+                    'content': data.get('Abstract', ''),
+                    'source': data.get('AbstractSource', 'DuckDuckGo'),
+                    'url': data.get('AbstractURL', ''),
+                    'reliability': self.get_source_reliability(data.get('AbstractURL', '')),
+                    'type': 'instant_answer'
+                })
+            
+            # Extract related topics
+            if data.get('RelatedTopics'):
+                for topic in data.get('RelatedTopics', [])[:3]:
+                    if isinstance(topic, dict) and topic.get('Text'):
+                        search_results.append({
+                            'title': topic.get('Text', '')[:100],
+                            'content': topic.get('Text', ''),
+                            'source': 'DuckDuckGo',
+                            'url': topic.get('FirstURL', ''),
+                            'reliability': 0.6,
+                            'type': 'related_topic'
+                        })
+        
+        return search_results
+    
     def search_wikipedia(self, query, max_results=3):
         """Search Wikipedia for information"""
-        results = []
+        # Clean query for Wikipedia
+        clean_query = query.replace(' ', '_')
+        cached = self.knowledge_base['wiki_cache'].get(clean_query)
+        return self._remember_wikipedia(clean_query, *self._fetch_wikipedia(clean_query, cached))
+    
+    def _fetch_wikipedia(self, clean_query, cached):
+        """Fetch a Wikipedia summary as (result, etag); (None, None) if none.
         
+        Touches no shared state; the caller records the outcome with
+        _remember_wikipedia.
+        """
         try:
             # Wikipedia API search
             search_url = "https://en.wikipedia.org/api/rest_v1/page/summary/"
             
-            # Clean query for Wikipedia
-            clean_query = query.replace(' ', '_')
+            # Revalidate a previously fetched summary instead of re-downloading it
+            headers = {'If-None-Match': cached['etag']} if cached else None
             
-            response = requests.get(f"{search_url}{clean_query}", headers=self.headers, timeout=10)
+            response = self._session.get(f"{search_url}{clean_query}", headers=headers, timeout=10)
             
+            if response.status_code == 304 and cached:
+                return dict(cached['result']), cached['etag']
             if response.status_code == 200:
-                data = response.json()
+                data = _parse_json(response.content)
                 
-                results.append({
+                result = {
                     'title': data.get('title', 'Unknown'),
                     'content': data.get('extract', ''),
                     'source': 'Wikipedia',
                     'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
                     'reliability': 0.9,
                     'type': 'wikipedia'
-                })
+                }
+                return result, response.headers.get('ETag')
             
         except Exception as e:
             print(f"Wikipedia search error: {e}")
         
-        return results
+        return None, None
+    
+    def _remember_wikipedia(self, clean_query, result, etag):
+        """Record a fetched summary in the ETag cache and return it as results"""
+        if result is None:
+            return []
+        if etag:
+            wiki_cache = self.knowledge_base['wiki_cache']
+            cached = wiki_cache.get(clean_query)
+            if cached is None or cached['etag'] != etag:
+                wiki_cache[clean_query] = {'etag': etag, 'result': dict(result)}
+                self._dirty.add('knowledge')
+            wiki_cache.move_to_end(clean_query)
+            if len(wiki_cache) > self.max_wiki_cache_entries:
+                wiki_cache.popitem(last=False)
+        return [result]
     
     def get_source_reliability(self, url):
         """Get reliability score for a source"""
         if not url:
             return 0.5
-        
-        domain = urlparse(url).netloc.lower()
+        return self._reliability_for(url)
+    
+    def _lookup_reliability(self, url):
+        """Resolve a URL's reliability from the domain index"""
+        domain = urlparse(url).hostname or ''
         
         # Remove www. prefix
         if domain.startswith('www.'):
             domain = domain[4:]
         
-        # Check against trusted sources
-        for trusted_domain, reliability in self.trusted_sources.items():
-            if trusted_domain in domain:
-                return reliability
-        
-        # Check against custom reliability scores
-        for source, reliability in self.learning_sources.get('source_reliability', {}).items():
-            if source in domain:
+        # Walk up the labels (en.wikipedia.org -> wikipedia.org -> org)
+        index = self._reliability_index
+        while domain:
+            reliability = index.get(domain)
+            if reliability is not None:
                 return reliability
+            domain = domain.partition('.')[2]
         
         # Default reliability for unknown sources
         return 0.5
     
-    def extract_facts_from_text(self, text, topic):
+    def _build_reliability_index(self):
+        """Index source reliability by domain; trusted sources take precedence"""
+        index = dict(self.learning_sources.get('source_reliability', {}))
+        index.update(self.trusted_sources)
+        self._reliability_index = index
+        # Results repeat domains; memoize per URL until the index changes
+        self._reliability_for = functools.lru_cache(maxsize=4096)(self._lookup_reliability)
+    
+    def extract_facts_from_text(self, text, topic, extracted_at=None):
         """Extract facts from text content"""
+        if extracted_at is None:
+            extracted_at = time.time()
         facts = []
         
-        # Simple fact extraction patterns
-        fact_patterns = [
-            r'([A-Z][^.!?]*(?:is|are|was|were|will be|has been|have been)[^.!?]*[.!?])',
-            r'([A-Z][^.!?]*(?:invented|discovered|created|founded|established)[^.!?]*[.!?])',
-            r'([A-Z][^.!?]*(?:born|died|lived)[^.!?]*[.!?])',
-            r'([A-Z][^.!?]*(?:\d{4}|\d{1,2}\/\d{1,2}\/\d{4})[^.!?]*[.!?])',
-            r'([A-Z][^.!?]*(?:located|situated|found)[^.!?]*[.!?])'
-        ]
-        
-        for pattern in fact_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                if len(match.strip()) > 20:  # Filter out very short matches
-                    facts.append({
-                        'fact': match.strip(),
-                        'topic': topic,
-                        'confidence': 0.7,
-                        'extracted_at': datetime.now().isoformat()
-                    })
+        for m in self._FACT_RE.finditer(text):
+            match = m.group(1).strip()
+            if len(match) > 20:  # Filter out very short matches
+                facts.append({
+                    'fact': match,
+                    'topic': topic,
+                    'confidence': 0.7,
+                    'extracted_at': extracted_at
+                })
         
         return facts
     
     def learn_from_search_results(self, query, results):
         """Learn from search results"""
         topic_key = self.generate_topic_key(query)
+        now_ts = time.time()
+        now_iso = datetime.fromtimestamp(now_ts).isoformat()
         
         # Initialize topic if not exists
         if topic_key not in self.knowledge_base['topics']:
             self.knowledge_base['topics'][topic_key] = {
                 'query': query,
-                'first_learned': datetime.now().isoformat(),
-                'last_updated': datetime.now().isoformat(),
+                'first_learned': now_iso,
+                'last_updated': now_ts,
                 'facts': [],
                 'sources': [],
                 'reliability_score': 0.0
             }
+            self._index_topic(topic_key, query)
         
         topic = self.knowledge_base['topics'][topic_key]
+        self._dirty.add('knowledge')
         total_reliability = 0
         fact_count = 0
         
+        # Hash existing facts once per topic so duplicate checks are set lookups
+        known_hashes = self._fact_hashes.get(topic_key)
+        if known_hashes is None:
+            known_hashes = self._fact_hashes[topic_key] = {
+                self.generate_fact_hash(f['fact']) for f in topic['facts']
+            }
+        sources_by_url = {source['url']: source for source in topic['sources']}
+        
         for result in results:
             # Add source
             source_info = {
                 'url': result.get('url', ''),
                 'title': result.get('title', ''),
                 'reliability': result.get('reliability', 0.5),
-                'accessed_at': datetime.now().isoformat()
+                'accessed_at': now_iso
             }
             
-            if source_info not in topic['sources']:
+            known_source = sources_by_url.get(source_info['url'])
+            if known_source is None:
+                sources_by_url[source_info['url']] = source_info
                 topic['sources'].append(source_info)
+                self._total_sources += 1
+            else:
+                known_source.update(source_info)
             
             # Extract and add facts
             content = result.get('content', '')
             if content:
-                facts = self.extract_facts_from_text(content, query)
+                facts = self.extract_facts_from_text(content, query, now_ts)
                 
                 for fact in facts:
                     fact['source'] = result.get('source', 'Unknown')
@@ -298,22 +453,35 @@ class InternetLearningSystem:
                     
                     # Check if fact already exists
                     fact_hash = self.generate_fact_hash(fact['fact'])
-                    if fact_hash not in [self.generate_fact_hash(f['fact']) for f in topic['facts']]:
+                    if fact_hash not in known_hashes:
+                        known_hashes.add(fact_hash)
                         topic['facts'].append(fact)
                         fact_count += 1
                         total_reliability += fact['source_reliability']
         
         # Update topic reliability
         if fact_count > 0:
-            topic['reliability_score'] = total_reliability / fact_count
-            topic['last_updated'] = datetime.now().isoformat()
+            self._total_facts += fact_count
+            
+            # Drop the oldest facts once the topic is over its cap
+            overflow = len(topic['facts']) - self.max_facts_per_topic
+            if overflow > 0:
+                for fact in topic['facts'][:overflow]:
+                    known_hashes.discard(self.generate_fact_hash(fact['fact']))
+                del topic['facts'][:overflow]
+                self._total_facts -= overflow
+            
+            new_score = total_reliability / fact_count
+            self._reliability_sum += new_score - topic['reliability_score']
+            topic['reliability_score'] = new_score
+            topic['last_updated'] = now_ts
             
             # Add to recent updates
             self.knowledge_base['recent_updates'].append({
                 'topic': query,
                 'topic_key': topic_key,
                 'facts_added': fact_count,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso
             })
             
             # Keep only recent updates
@@ -322,11 +490,11 @@ class InternetLearningSystem:
     
     def generate_topic_key(self, query):
         """Generate a unique key for a topic"""
-        return hashlib.md5(query.lower().encode()).hexdigest()[:16]
+        return hashlib.blake2b(query.lower().encode(), digest_size=8).hexdigest()
     
     def generate_fact_hash(self, fact):
         """Generate a hash for a fact to check duplicates"""
-        return hashlib.md5(fact.lower().encode()).hexdigest()[:16]
+        return hashlib.blake2b(fact.lower().encode(), digest_size=8).hexdigest()
     
     def get_knowledge_about(self, topic):
         """Get knowledge about a specific topic"""
@@ -337,9 +505,10 @@ class InternetLearningSystem:
             
             # Filter recent and reliable facts
             recent_facts = []
+            now_ts = time.time()
+            max_age = self.max_fact_age_days * 86400
             for fact in topic_data['facts']:
-                fact_date = datetime.fromisoformat(fact['extracted_at'])
-                if (datetime.now() - fact_date).days <= self.max_fact_age_days:
+                if now_ts - fact['extracted_at'] <= max_age:
                     if fact['source_reliability'] >= self.min_source_reliability:
                         recent_facts.append(fact)
             
@@ -359,8 +528,7 @@ class InternetLearningSystem:
         existing_knowledge = self.get_knowledge_about(query)
         
         if existing_knowledge:
-            last_updated = datetime.fromisoformat(existing_knowledge['last_updated'])
-            if (datetime.now() - last_updated).days < 1:  # Updated within last day
+            if time.time() - existing_knowledge['last_updated'] < 86400:  # Updated within last day
                 return existing_knowledge
         
         # Search the internet
@@ -379,64 +547,98 @@ class InternetLearningSystem:
         
         return None
     
+    def _index_topic(self, topic_key, query):
+        """Add a topic's query words to the inverted index"""
+        self._topic_rank[topic_key] = next(self._topic_counter)
+        for word in set(_WORD_RE.findall(query.lower())):
+            self._word_topics[word].add(topic_key)
+    
+    def _unindex_topic(self, topic_key, query):
+        """Remove a topic's query words from the inverted index"""
+        self._topic_rank.pop(topic_key, None)
+        for word in set(_WORD_RE.findall(query.lower())):
+            topic_keys = self._word_topics.get(word)
+            if topic_keys is not None:
+                topic_keys.discard(topic_key)
+                if not topic_keys:
+                    del self._word_topics[word]
+    
     def get_relevant_facts(self, text, max_facts=3):
         """Get relevant facts based on input text"""
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = set(_WORD_RE.findall(text.lower()))
+        topics = self.knowledge_base['topics']
+        word_topics = self._word_topics
+        
+        # Relevance score: number of words shared with the topic query.
+        # Only topics sharing at least one word are ever touched.
+        scores = {}
+        for word in words:
+            for topic_key in word_topics.get(word, ()):
+                scores[topic_key] = scores.get(topic_key, 0) + 1
+        
+        # Visit candidates in topic insertion order, so equal scores keep
+        # that order whatever order the index sets iterate in
         relevant_facts = []
-        
-        for topic_key, topic_data in self.knowledge_base['topics'].items():
-            topic_query = topic_data['query'].lower()
-            
-            # Calculate relevance score
-            relevance_score = 0
-            for word in words:
-                if word in topic_query:
-                    relevance_score += 1
-            
-            if relevance_score > 0:
-                # Get best facts from this topic
-                topic_facts = topic_data['facts'][:2]  # Top 2 facts per topic
-                for fact in topic_facts:
-                    fact['relevance_score'] = relevance_score
-                    relevant_facts.append(fact)
+        for topic_key in sorted(scores, key=self._topic_rank.__getitem__):
+            relevance_score = scores[topic_key]
+            # Get best facts from this topic
+            topic_facts = topics[topic_key]['facts'][:2]  # Top 2 facts per topic
+            for fact in topic_facts:
+                fact['relevance_score'] = relevance_score
+                relevant_facts.append(fact)
         
         # Sort by relevance and return top facts
         relevant_facts.sort(key=lambda x: x['relevance_score'], reverse=True)
         return relevant_facts[:max_facts]
     
+    def _recount_stats(self):
+        """Recompute the running totals used by get_learning_stats"""
+        topics = self.knowledge_base['topics'].values()
+        self._total_facts = sum(len(topic['facts']) for topic in topics)
+        self._total_sources = sum(len(topic['sources']) for topic in topics)
+        self._reliability_sum = sum(topic['reliability_score'] for topic in topics)
+    
     def get_learning_stats(self):
         """Get statistics about internet learning"""
-        total_facts = sum(len(topic['facts']) for topic in self.knowledge_base['topics'].values())
-        total_sources = sum(len(topic['sources']) for topic in self.knowledge_base['topics'].values())
-        
         return {
             'total_topics': len(self.knowledge_base['topics']),
-            'total_facts': total_facts,
-            'total_sources': total_sources,
+            'total_facts': self._total_facts,
+            'total_sources': self._total_sources,
             'recent_updates': len(self.knowledge_base['recent_updates']),
             'searches_performed': len(self.search_history),
-            'avg_reliability': sum(topic['reliability_score'] for topic in self.knowledge_base['topics'].values()) / max(len(self.knowledge_base['topics']), 1)
+            'avg_reliability': self._reliability_sum / max(len(self.knowledge_base['topics']), 1)
         }
     
     def cleanup_old_data(self):
         """Clean up old data to manage storage"""
-        cutoff_date = datetime.now() - timedelta(days=self.max_fact_age_days)
-        
-        for topic_key, topic_data in list(self.knowledge_base['topics'].items()):
-            # Remove old facts
-            topic_data['facts'] = [
-                fact for fact in topic_data['facts']
-                if datetime.fromisoformat(fact['extracted_at']) > cutoff_date
-            ]
-            
-            # Remove topics with no facts
-            if not topic_data['facts']:
-                del self.knowledge_base['topics'][topic_key]
+        cutoff = time.time() - self.max_fact_age_days * 86400
+        topics = self.knowledge_base['topics']
+        
+        # Remove old facts in place, noting topics left with none
+        empty_topics = []
+        for topic_key, topic_data in topics.items():
+            facts = topic_data['facts']
+            kept = [fact for fact in facts if fact['extracted_at'] > cutoff]
+            if len(kept) != len(facts):
+                facts[:] = kept
+                self._fact_hashes.pop(topic_key, None)
+                self._dirty.add('knowledge')
+            if not kept:
+                empty_topics.append(topic_key)
+        
+        # Remove topics with no facts
+        for topic_key in empty_topics:
+            self._unindex_topic(topic_key, topics.pop(topic_key)['query'])
+            self._fact_hashes.pop(topic_key, None)
+            self._dirty.add('knowledge')
+        
+        self._recount_stats()
         
         # Keep only recent search history
-        self.search_history = [
-            search for search in self.search_history
-            if datetime.fromisoformat(search['timestamp']) > cutoff_date
-        ]
+        history = self.search_history
+        kept = [search for search in history if search['timestamp'] > cutoff]
+        if len(kept) != len(history):
+            history[:] = kept
+            self._dirty.add('history')
         
         self.save_all_data()
@@ -0,0 +1,10 @@
+"""Kiki assistant runner.
+
+Thin entry point around `end_project`, which holds the shared assistant
+implementation; only the default name differs.
+"""
+
+from end_project import main
+
+if __name__ == "__main__":
+    main(name="Kiki")
@@ -6,61 +6,376 @@ keeps lightweight dynamic responses for quick replies.
 
 from __future__ import annotations
 
+import atexit
 import difflib
+import gzip
+import hashlib
+import heapq
+import mmap
 import json
 import os
 import re
-from collections import defaultdict
+import shutil
+import time
+from array import array
+from collections import Counter, defaultdict, deque
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pickle
+import random
 from typing import List, Optional, Dict
 
+try:
+    import orjson
+except ImportError:  # optional, faster JSON
+    orjson = None
+
+# Maximal \w runs always sit on word boundaries, so no \b anchors are needed
+_WORD_RE = re.compile(r'\w+')
+
+# Most recent dynamic responses kept for similarity matching
+_MAX_DYNAMIC_RESPONSES = 1000
+
+# Keyword sets used by the pattern and category classifiers. Single words
+# are matched against the token set; two-word phrases against the token
+# bigrams.
+_GREETING_WORDS = frozenset(("hello", "hi", "hey", "greetings"))
+_GREETING_PHRASES = frozenset((("good", "morning"), ("good", "evening")))
+_GOODBYE_WORDS = frozenset(("bye", "goodbye", "farewell"))
+_GOODBYE_PHRASES = frozenset((("see", "you"), ("take", "care")))
+_POSITIVE_WORDS = frozenset(("good", "great", "awesome", "wonderful", "amazing", "love", "like"))
+_NEGATIVE_WORDS = frozenset(("bad", "terrible", "awful", "hate", "dislike", "horrible"))
+_QUESTION_WORDS = frozenset(("what", "how", "why", "when", "where", "who", "which"))
+_COMPLIMENT_WORDS = frozenset(("good", "great", "awesome", "wonderful", "amazing"))
+_COMPLAINT_WORDS = frozenset(("bad", "terrible", "awful", "horrible"))
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+# [epoch second, ISO string] for the last timestamp handed out by _now_iso
+_TS_CACHE = [0, ""]
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of ``text``."""
+    return _WORD_RE.findall(text.lower())
+
+
+def _now_iso() -> str:
+    """Current local time as ISO 8601, truncated to the second and cached
+    so repeated calls within the same second reuse one string."""
+    now = int(time.time())
+    if now != _TS_CACHE[0]:
+        _TS_CACHE[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _TS_CACHE[1]
+
+
+def _read_mapped(path: str, parse):
+    """Parse a file through a read-only memory map, without copying it into
+    a bytes object first. Empty files (which cannot be mapped) parse as b"".
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return parse(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return parse(view)
+
+
+def _read_snapshot(path: str, parse=_loads):
+    """Parse the snapshot at ``path`` with `parse`, or return None if there is none.
+
+    Snapshots are gzip-compressed; an uncompressed file without the ``.gz``
+    suffix, as written by older versions, is read when no compressed one
+    exists yet.
+    """
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return parse(gzip.decompress(f.read()))
+    legacy_path = path[:-len('.gz')]
+    if os.path.exists(legacy_path):
+        return _read_mapped(legacy_path, parse)
+    return None
+
+
+def _write_file(path: str, payload: bytes) -> None:
+    """Write `payload` to a temp file and rename it over `path`, so a crash
+    mid-write never leaves a truncated file behind."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Encode `obj` as UTF-8 JSON bytes, with orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class _CountMinSketch:
+    """Fixed-size approximate counter (4 rows x 65536 uint32 cells).
+
+    One 64-bit blake2b digest per key supplies the four 16-bit row indices.
+    Estimates never undercount; they may overcount on hash collisions.
+    """
+
+    DEPTH = 4
+    WIDTH = 1 << 16
+
+    def __init__(self, data=None) -> None:
+        nbytes = self.DEPTH * self.WIDTH * array('I').itemsize
+        if data is None or len(data) != nbytes:
+            data = bytes(nbytes)
+        self.cells = array('I')
+        self.cells.frombytes(data)
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add `count` to `key` and return its new estimated total."""
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+        cells = self.cells
+        estimate = None
+        for row in range(self.DEPTH):
+            i = row * self.WIDTH + ((digest >> (16 * row)) & 0xFFFF)
+            value = min(cells[i] + count, 0xFFFFFFFF)
+            cells[i] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def to_bytes(self) -> bytes:
+        return self.cells.tobytes()
+
+
+def _to_epoch(value) -> int:
+    """Convert a legacy ISO-8601 timestamp to epoch seconds; epochs pass through."""
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+class _WordTable(MutableMapping):
+    """The ``vocabulary["words"]`` mapping, stored compactly.
+
+    Most words only ever carry a first-seen time, kept here as epoch seconds
+    in ``first_seen``. Reading a word through the mapping expands it into the
+    usual ``{"first_seen": iso, "contexts": [...]}`` dict, which is kept in
+    ``entries`` so callers can mutate what they get back.
+    """
+
+    def __init__(self) -> None:
+        self.first_seen: Dict[str, int] = {}
+        self.entries: Dict[str, dict] = {}
+
+    @classmethod
+    def from_json(cls, data) -> "_WordTable":
+        table = cls()
+        # Older snapshots mapped each word to a dict, so a learned word such
+        # as "names" is no sign of the compact columns; the format key is
+        if data.get("format") == 2 and isinstance(data.get("names"), list):
+            table.first_seen = dict(zip(data["names"], data["first_seen"]))
+            table.entries = data.get("entries", {})
+        else:
+            # Older snapshots stored a dict per word
+            for word, entry in data.items():
+                if entry.keys() <= {"first_seen", "contexts"} and not entry.get("contexts"):
+                    table.first_seen[word] = _to_epoch(entry["first_seen"])
+                else:
+                    table.entries[word] = entry
+        return table
+
+    def to_json(self) -> Dict:
+        names = list(self.first_seen)
+        first_seen = list(self.first_seen.values())
+        entries = {}
+        # Expanded entries that were only read go back to the compact columns
+        for word, entry in self.entries.items():
+            if entry.keys() <= {"first_seen", "contexts"} and not entry.get("contexts"):
+                names.append(word)
+                first_seen.append(_to_epoch(entry["first_seen"]))
+            else:
+                entries[word] = entry
+        return {"format": 2, "names": names, "first_seen": first_seen, "entries": entries}
+
+    def add_new(self, words, first_seen: int) -> None:
+        """Record first-seen times for the words not yet known."""
+        for word in words:
+            if word not in self.first_seen and word not in self.entries:
+                self.first_seen[word] = first_seen
+
+    def is_enriched(self, word: str) -> bool:
+        """True if the word carries translations or a definition."""
+        entry = self.entries.get(word)
+        return bool(entry and (entry.get("translations") or entry.get("definition")))
+
+    def discard(self, word: str) -> None:
+        if self.first_seen.pop(word, None) is None:
+            self.entries.pop(word, None)
+
+    def __getitem__(self, word: str) -> dict:
+        entry = self.entries.get(word)
+        if entry is None:
+            first_seen = self.first_seen.pop(word)
+            entry = self.entries[word] = {
+                "first_seen": datetime.fromtimestamp(first_seen).isoformat(),
+                "contexts": []
+            }
+        return entry
+
+    def __setitem__(self, word: str, entry: dict) -> None:
+        self.first_seen.pop(word, None)
+        self.entries[word] = entry
+
+    def __delitem__(self, word: str) -> None:
+        if self.first_seen.pop(word, None) is None:
+            del self.entries[word]
+
+    def __contains__(self, word) -> bool:
+        return word in self.first_seen or word in self.entries
+
+    def __iter__(self):
+        # Reading a compact word moves it into ``entries``, so iterate over a
+        # snapshot of the keys; items() and values() read while iterating
+        yield from list(self.first_seen) + list(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.first_seen) + len(self.entries)
+
+
 class LearningSystem:
     def __init__(self, data_dir: str = "data") -> None:
         self.data_dir = data_dir
-        self.vocabulary_file = os.path.join(data_dir, "vocabulary.json")
+        # The large snapshots are gzip-compressed (JSON about 9x smaller)
+        self.vocabulary_file = os.path.join(data_dir, "vocabulary.json.gz")
         self.patterns_file = os.path.join(data_dir, "patterns.json")
-        self.responses_file = os.path.join(data_dir, "learned_responses.json")
+        self.responses_file = os.path.join(data_dir, "learned_responses.json.gz")
         self.context_file = os.path.join(data_dir, "context_associations.pkl")
+        # Append-only log of vocabulary updates since the last snapshot
+        self.vocab_journal = os.path.join(data_dir, "vocab.jsonl")
+        # A compacting save sets the journal aside as vocab.jsonl.<generation>
+        # until the snapshot stamped with that generation is written
+        self._set_aside_journal_re = re.compile(re.escape(os.path.basename(self.vocab_journal)) + r'\.(\d+)$')
+        # Approximate counts of phrases not yet frequent enough to store
+        self.phrase_sketch_file = os.path.join(data_dir, "phrase_sketch.bin.gz")
         
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         
+        # Learning parameters
+        self.min_pattern_frequency = 2
+        self.max_vocabulary_size = 10000
+        
+        # Per-instance RNG for picking canned replies
+        self._rng = random.Random()
+        
         # Initialize data structures
+        self._phrase_sketch = self.load_phrase_sketch()
         self.vocabulary = self.load_vocabulary()
         self.patterns = self.load_patterns()
         self.learned_responses = self.load_responses()
         self.context_associations = self.load_context_associations()
+        self._build_response_index()
         
-        # Learning parameters
-        self.min_pattern_frequency = 2
-        self.max_vocabulary_size = 10000
+        # Conversation turns are persisted in batches; see flush()
+        self.save_every = 25
+        self.journal_compact_lines = 1000
+        self._dirty = False
+        self._turns_since_save = 0
+        # Append handle for the vocabulary journal, opened on first write
+        self._journal_fh = None
+        # Snapshots are written off the caller's thread, one save at a time
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='learning-save')
+        self._pending_save = None
+        atexit.register(self.close)
+        atexit.register(self.flush)
         
     def load_vocabulary(self) -> Dict:
-        """Load vocabulary from file."""
-        if os.path.exists(self.vocabulary_file):
-            with open(self.vocabulary_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Convert frequency back to defaultdict
-                if 'frequency' in data:
-                    frequency_dict = defaultdict(int)
-                    frequency_dict.update(data['frequency'])
-                    data['frequency'] = frequency_dict
-                else:
-                    data['frequency'] = defaultdict(int)
-                return data
-        return {
-            "words": {},
-            "phrases": {},
-            "sentiment": {},
-            "frequency": defaultdict(int)
-        }
+        """Load the vocabulary snapshot, then replay the journal on top."""
+        data = _read_snapshot(self.vocabulary_file)
+        if data is not None:
+            data['words'] = _WordTable.from_json(data.get('words', {}))
+            # Phrases map straight to their counts; older snapshots stored
+            # {"frequency": n, "contexts": []} per phrase
+            data['phrases'] = {
+                phrase: entry["frequency"] if isinstance(entry, dict) else entry
+                for phrase, entry in data.get('phrases', {}).items()
+            }
+            # Convert frequency back to a Counter
+            data['frequency'] = Counter(data.get('frequency', {}))
+            self._journal_generation = data.pop('journal_generation', 0)
+        else:
+            data = {
+                "words": _WordTable(),
+                "phrases": {},
+                "sentiment": {},
+                "frequency": Counter()
+            }
+            self._journal_generation = 0
+        
+        # A set-aside journal whose generation the snapshot carries was
+        # compacted before a crash stopped its removal. Later ones were not,
+        # and their lines predate the current journal: fold them back in.
+        pending = []
+        for generation, path in self._set_aside_journals():
+            if generation <= self._journal_generation:
+                os.remove(path)
+            else:
+                pending.append(path)
+        if pending:
+            if os.path.exists(self.vocab_journal):
+                pending.append(self.vocab_journal)
+            with open(pending[0], 'ab') as dst:
+                for path in pending[1:]:
+                    with open(path, 'rb') as src:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(path)
+            os.replace(pending[0], self.vocab_journal)
+        
+        self._journal_lines = 0
+        if os.path.exists(self.vocab_journal):
+            with open(self.vocab_journal, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = _loads(line)
+                    except ValueError:
+                        continue  # torn write at the tail
+                    self._apply_vocabulary_delta(data, entry["words"], entry["phrases"],
+                                                 _to_epoch(entry["first_seen"]))
+                    self._journal_lines += 1
+        self._evict_rare_words(data)
+        self._evict_rare_phrases(data)
+        return data
+    
+    def _set_aside_journals(self) -> List[tuple]:
+        """(generation, path) of each journal set aside by a compaction, oldest first."""
+        found = []
+        for name in os.listdir(self.data_dir):
+            match = self._set_aside_journal_re.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.data_dir, name)))
+        return sorted(found)
+    
+    def load_phrase_sketch(self) -> _CountMinSketch:
+        """Load the phrase count-min sketch saved with the last snapshot."""
+        sketch = _read_snapshot(self.phrase_sketch_file, _CountMinSketch)
+        return sketch if sketch is not None else _CountMinSketch()
     
     def load_patterns(self) -> Dict:
         """Load conversation patterns from file."""
         if os.path.exists(self.patterns_file):
-            with open(self.patterns_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_mapped(self.patterns_file, _loads)
         return {
             "input_patterns": {},
             "response_patterns": {},
@@ -69,92 +384,297 @@ class LearningSystem:
     
     def load_responses(self) -> Dict:
         """Load learned responses from file."""
-        if os.path.exists(self.responses_file):
-            with open(self.responses_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            "categories": {},
-            "dynamic_responses": [],
-            "context_responses": {}
-        }
+        responses = _read_snapshot(self.responses_file)
+        if responses is None:
+            responses = {
+                "categories": {},
+                "dynamic_responses": [],
+                "context_responses": {}
+            }
+        # Bounded deque: appends evict the oldest entry without copying
+        responses["dynamic_responses"] = deque(
+            responses.get("dynamic_responses", []), maxlen=_MAX_DYNAMIC_RESPONSES
+        )
+        return responses
     
-    def load_context_associations(self):
-        """Load context associations from pickle file."""
+    def load_context_associations(self) -> Dict[int, int]:
+        """Load context associations from pickle file.
+
+        Associations are a flat ``{pair_key: count}`` dict where the key packs
+        two word ids (see ``_pair_key``); the words live in ``_assoc_words``.
+        """
+        self._assoc_words: List[str] = []
+        self._assoc_ids: Dict[str, int] = {}
+        associations: Dict[int, int] = {}
         if os.path.exists(self.context_file):
-            with open(self.context_file, 'rb') as f:
-                return pickle.load(f)
-        return defaultdict(lambda: defaultdict(int))
+            data = _read_mapped(self.context_file, pickle.loads)
+            if isinstance(data.get("format"), int):
+                self._assoc_words = data["words"]
+                self._assoc_ids = {word: i for i, word in enumerate(self._assoc_words)}
+                associations = data["counts"]
+            else:
+                # Older files stored nested {ctx_word: {resp_word: count}} dicts
+                for ctx_word, row in data.items():
+                    ctx_id = self._word_id(ctx_word)
+                    for resp_word, count in row.items():
+                        associations[self._pair_key(ctx_id, self._word_id(resp_word))] = count
+        return associations
     
-    def save_all_data(self) -> None:
-        """Save all learning data to files."""
-        # Convert defaultdict to regular dict for JSON serialization
-        vocab_to_save = dict(self.vocabulary)
-        vocab_to_save["frequency"] = dict(self.vocabulary["frequency"])
+    def _word_id(self, word: str) -> int:
+        """Intern a word for the association table."""
+        word_id = self._assoc_ids.get(word)
+        if word_id is None:
+            word_id = self._assoc_ids[word] = len(self._assoc_words)
+            self._assoc_words.append(word)
+        return word_id
+    
+    @staticmethod
+    def _pair_key(ctx_id: int, resp_id: int) -> int:
+        """Pack a (context, response) word-id pair into one int key."""
+        return (ctx_id << 32) | resp_id
+    
+    def get_context_associations(self, ctx_word: str) -> Dict[str, int]:
+        """Return response-word counts associated with a context word."""
+        ctx_id = self._assoc_ids.get(ctx_word.lower())
+        if ctx_id is None:
+            return {}
+        words = self._assoc_words
+        return {
+            words[key & 0xFFFFFFFF]: count
+            for key, count in self.context_associations.items()
+            if key >> 32 == ctx_id
+        }
+    
+    def save_all_data(self, compact: bool = True) -> None:
+        """Save all learning data to files.
+
+        With ``compact=False`` the vocabulary snapshot is left alone, since
+        the journal already holds its updates.
+        """
+        # Wait for an earlier save still writing. If it failed, say so; this
+        # save rewrites everything it covered.
+        error = self._save_error()
+        if error is not None:
+            print(f"Saving learning data failed, writing it again: {error}")
+        self._pending_save = None
+        
+        # The snapshot covers every journal line so far. Later turns go to a
+        # fresh journal; the old one is set aside under the next generation,
+        # which the snapshot records, and dropped once the snapshot is on disk.
+        done_journal = None
+        if compact and self._journal_lines:
+            self.close()
+            if os.path.exists(self.vocab_journal):
+                self._journal_generation += 1
+                done_journal = f"{self.vocab_journal}.{self._journal_generation}"
+                os.replace(self.vocab_journal, done_journal)
+            self._journal_lines = 0
         
-        with open(self.vocabulary_file, 'w', encoding='utf-8') as f:
-            json.dump(vocab_to_save, f, ensure_ascii=False, indent=2)
+        # Serialize fully in memory first, so the background writes only
+        # see immutable bytes while learning carries on
+        # Only the small patterns file stays indented for reading by hand
+        writes = self._vocabulary_payloads() if compact else []
+        writes.append((self.patterns_file, _dumps(self.patterns, indent=True)))
+        responses_to_save = dict(self.learned_responses)
+        responses_to_save["dynamic_responses"] = list(self.learned_responses["dynamic_responses"])
+        writes.append((self.responses_file, _dumps(responses_to_save)))
+        writes.append((self.context_file, pickle.dumps({
+            "format": 2,
+            "words": self._assoc_words,
+            "counts": self.context_associations
+        }, protocol=pickle.HIGHEST_PROTOCOL)))
         
-        with open(self.patterns_file, 'w', encoding='utf-8') as f:
-            json.dump(self.patterns, f, ensure_ascii=False, indent=2)
+        try:
+            self._pending_save = self._save_executor.submit(self._write_snapshot, writes, done_journal)
+        except RuntimeError:
+            # Executors refuse new work once the interpreter is shutting
+            # down, which is when the atexit flush runs
+            self._write_snapshot(writes, done_journal)
         
-        with open(self.responses_file, 'w', encoding='utf-8') as f:
-            json.dump(self.learned_responses, f, ensure_ascii=False, indent=2)
+        self._dirty = False
+        self._turns_since_save = 0
+    
+    def _save_error(self) -> Optional[BaseException]:
+        """Wait for the background save, if any, and return its error."""
+        if self._pending_save is None:
+            return None
+        return self._pending_save.exception()
+    
+    @staticmethod
+    def _write_snapshot(writes: List[tuple], done_journal: Optional[str]) -> None:
+        """Write each (path, bytes) pair, then remove the journal they replace.
+
+        Payloads bound for ``.gz`` paths are compressed here, off the
+        caller's thread.
+        """
+        for path, payload in writes:
+            if path.endswith('.gz'):
+                payload = gzip.compress(payload, compresslevel=1)
+            _write_file(path, payload)
+        if done_journal is not None:
+            os.remove(done_journal)
+    
+    def _vocabulary_payloads(self) -> List[tuple]:
+        """Serialized vocabulary snapshot and phrase sketch, as (path, bytes)."""
+        # Convert the Counter to a regular dict for JSON serialization
+        vocab_to_save = dict(self.vocabulary)
+        vocab_to_save["words"] = self.vocabulary["words"].to_json()
+        vocab_to_save["frequency"] = dict(self.vocabulary["frequency"])
+        vocab_to_save["journal_generation"] = self._journal_generation
         
-        with open(self.context_file, 'wb') as f:
-            pickle.dump(dict(self.context_associations), f)
+        # The journal replays through the sketch, so both must match the
+        # snapshot; the vocabulary goes last, as it commits the generation
+        return [
+            (self.phrase_sketch_file, self._phrase_sketch.to_bytes()),
+            (self.vocabulary_file, _dumps(vocab_to_save)),
+        ]
+    
+    def flush(self) -> None:
+        """Persist any learning not yet written to disk."""
+        if self._dirty or self._save_error() is not None:
+            self.save_all_data()
+    
+    def close(self) -> None:
+        """Close the vocabulary journal handle."""
+        if self._journal_fh is not None:
+            self._journal_fh.close()
+            self._journal_fh = None
+    
+    def _append_journal(self, data: bytes) -> None:
+        """Append journal lines through the long-lived handle."""
+        if not data:
+            return
+        if self._journal_fh is None:
+            self._journal_fh = open(self.vocab_journal, 'ab')
+        self._journal_fh.write(data)
+        self._journal_fh.flush()
     
     def learn_from_conversation(self, user_input: str, ai_response: str, context: Optional[str] = None) -> None:
         """Learn from a conversation exchange."""
-        # Learn vocabulary
-        self._learn_vocabulary(user_input)
-        self._learn_vocabulary(ai_response)
+        # Tokenize each side once; every step below reuses the word lists
+        user_words = _tokenize(user_input)
+        response_words = _tokenize(ai_response)
+        
+        # Learn vocabulary; both journal lines go out in one write
+        self._append_journal(self._learn_vocabulary(user_input, user_words)
+                             + self._learn_vocabulary(ai_response, response_words))
         
         # Learn patterns
-        self._learn_patterns(user_input, ai_response)
+        self._learn_patterns(user_input, ai_response, user_words, response_words)
         
         # Learn context associations
         if context:
-            self._learn_context_associations(user_input, ai_response, context)
+            self._learn_context_associations(user_input, ai_response, context, response_words)
         
         # Update response database
-        self._update_response_database(user_input, ai_response)
+        self._update_response_database(user_input, ai_response, user_words)
         
         # Save periodically
-        self.save_all_data()
+        self._dirty = True
+        self._turns_since_save += 1
+        if self._turns_since_save >= self.save_every:
+            self.save_all_data(compact=self._journal_lines >= self.journal_compact_lines)
     
-    def _learn_vocabulary(self, text: str) -> None:
-        """Learn new words and phrases from text."""
+    def _learn_vocabulary(self, text: str, words: Optional[List[str]] = None) -> bytes:
+        """Learn new words and phrases from text.
+
+        ``words`` may carry the already tokenized text. Returns the journal
+        line recording the update, for the caller to append (empty if
+        nothing was learned).
+        """
         # Clean and tokenize text
-        words = re.findall(r'\b\w+\b', text.lower())
+        if words is None:
+            words = _tokenize(text)
         
-        # Learn individual words
-        for word in words:
-            if len(word) > 2:  # Ignore very short words
-                self.vocabulary["frequency"][word] += 1
-                
-                # Track word in vocabulary
-                if word not in self.vocabulary["words"]:
-                    self.vocabulary["words"][word] = {
-                        "first_seen": datetime.now().isoformat(),
-                        "contexts": []
-                    }
-        
-        # Learn phrases (2-4 word combinations)
-        for i in range(len(words) - 1):
-            for j in range(2, min(5, len(words) - i + 1)):
-                phrase = " ".join(words[i:i+j])
-                if phrase not in self.vocabulary["phrases"]:
-                    self.vocabulary["phrases"][phrase] = {
-                        "frequency": 0,
-                        "contexts": []
-                    }
-                self.vocabulary["phrases"][phrase]["frequency"] += 1
-    
-    def _learn_patterns(self, user_input: str, ai_response: str) -> None:
+        # Individual words, ignoring very short ones
+        word_counts = Counter(word for word in words if len(word) > 2)
+        
+        # Phrases (2-4 word combinations); each n-gram extends the
+        # (n-1)-gram starting at the same word instead of joining afresh
+        phrase_counts = Counter()
+        grams = words
+        for offset in (1, 2, 3):
+            grams = [gram + " " + word for gram, word in zip(grams, words[offset:])]
+            phrase_counts.update(grams)
+        
+        if not word_counts and not phrase_counts:
+            return b""
+        
+        first_seen = int(time.time())
+        self._apply_vocabulary_delta(self.vocabulary, word_counts, phrase_counts, first_seen)
+        self._evict_rare_words(self.vocabulary)
+        self._evict_rare_phrases(self.vocabulary)
+        
+        # One journal line per call keeps the update durable without
+        # rewriting the whole vocabulary snapshot
+        self._journal_lines += 1
+        return _dumps({
+            "first_seen": first_seen,
+            "words": word_counts,
+            "phrases": phrase_counts
+        }) + b"\n"
+    
+    def _evict_rare_words(self, vocabulary: Dict) -> None:
+        """Keep the vocabulary near ``max_vocabulary_size`` by dropping the
+        least frequent words.
+
+        Eviction waits until the size is 10% over the cap, so its cost is
+        amortized over many learn calls. Words carrying translations or a
+        definition are never evicted.
+        """
+        frequency = vocabulary["frequency"]
+        if len(frequency) <= self.max_vocabulary_size * 1.1:
+            return
+        words = vocabulary["words"]
+        evictable = (item for item in frequency.items() if not words.is_enriched(item[0]))
+        excess = len(frequency) - self.max_vocabulary_size
+        for word, _ in heapq.nsmallest(excess, evictable, key=lambda item: item[1]):
+            del frequency[word]
+            words.discard(word)
+    
+    def _evict_rare_phrases(self, vocabulary: Dict) -> None:
+        """Keep the stored phrases near ``max_vocabulary_size`` by dropping
+        the least frequent ones, with the same 10% slack as words.
+
+        The sketch keeps counting evicted phrases, so one that comes back
+        often enough is stored again with its estimated count.
+        """
+        phrases = vocabulary["phrases"]
+        if len(phrases) <= self.max_vocabulary_size * 1.1:
+            return
+        excess = len(phrases) - self.max_vocabulary_size
+        for phrase, _ in heapq.nsmallest(excess, phrases.items(), key=lambda item: item[1]):
+            del phrases[phrase]
+    
+    def _apply_vocabulary_delta(self, vocabulary: Dict, word_counts: Dict[str, int],
+                                phrase_counts: Dict[str, int], first_seen: int) -> None:
+        """Add word and phrase counts to a vocabulary dict.
+
+        New phrases are counted in the sketch and only stored once their
+        estimated frequency reaches ``min_pattern_frequency``.
+        """
+        vocabulary["frequency"].update(word_counts)
+        
+        # Track new words in vocabulary
+        vocabulary["words"].add_new(word_counts, first_seen)
+        
+        phrases = vocabulary["phrases"]
+        sketch = self._phrase_sketch
+        for phrase, count in phrase_counts.items():
+            if phrase in phrases:
+                phrases[phrase] += count
+                continue
+            estimate = sketch.add(phrase, count)
+            if estimate >= self.min_pattern_frequency:
+                phrases[phrase] = estimate
+    
+    def _learn_patterns(self, user_input: str, ai_response: str,
+                        user_words: Optional[List[str]] = None,
+                        response_words: Optional[List[str]] = None) -> None:
         """Learn conversation patterns."""
         # Extract key patterns from user input
-        user_patterns = self._extract_patterns(user_input)
-        response_patterns = self._extract_patterns(ai_response)
+        user_patterns = self._extract_patterns(user_input, user_words)
+        response_patterns = self._extract_patterns(ai_response, response_words)
         
         # Associate input patterns with response patterns
         for user_pattern in user_patterns:
@@ -165,56 +685,66 @@ class LearningSystem:
                 if response_pattern not in self.patterns["input_patterns"][user_pattern]:
                     self.patterns["input_patterns"][user_pattern].append(response_pattern)
     
-    def _extract_patterns(self, text: str) -> List[str]:
+    def _extract_patterns(self, text: str, words: Optional[List[str]] = None) -> List[str]:
         """Extract patterns from text."""
         patterns = []
         
-        # Question patterns
-        if text.strip().endswith('?'):
+        # Question patterns (the common case needs no stripped copy)
+        if text.endswith('?') or text.rstrip().endswith('?'):
             patterns.append("question")
         
+        if words is None:
+            words = _tokenize(text)
+        tokens = set(words)
+        bigrams = set(zip(words, words[1:]))
+        
         # Greeting patterns
-        greeting_words = ["hello", "hi", "hey", "greetings", "good morning", "good evening"]
-        if any(word in text.lower() for word in greeting_words):
+        if tokens & _GREETING_WORDS or bigrams & _GREETING_PHRASES:
             patterns.append("greeting")
         
         # Goodbye patterns
-        goodbye_words = ["bye", "goodbye", "see you", "farewell", "take care"]
-        if any(word in text.lower() for word in goodbye_words):
+        if tokens & _GOODBYE_WORDS or bigrams & _GOODBYE_PHRASES:
             patterns.append("goodbye")
         
         # Sentiment patterns
-        positive_words = ["good", "great", "awesome", "wonderful", "amazing", "love", "like"]
-        negative_words = ["bad", "terrible", "awful", "hate", "dislike", "horrible"]
-        
-        if any(word in text.lower() for word in positive_words):
+        if tokens & _POSITIVE_WORDS:
             patterns.append("positive")
-        if any(word in text.lower() for word in negative_words):
+        if tokens & _NEGATIVE_WORDS:
             patterns.append("negative")
         
         # Length patterns
-        if len(text.split()) > 20:
+        word_count = len(words)
+        if word_count > 20:
             patterns.append("long_text")
-        elif len(text.split()) < 3:
+        elif word_count < 3:
             patterns.append("short_text")
         
         return patterns
     
-    def _learn_context_associations(self, user_input: str, ai_response: str, context: str) -> None:
+    def _learn_context_associations(self, user_input: str, ai_response: str, context: str,
+                                    response_words: Optional[List[str]] = None) -> None:
         """Learn associations between context and responses."""
-        # Extract keywords from context
-        context_keywords = re.findall(r'\b\w+\b', context.lower())
-        response_keywords = re.findall(r'\b\w+\b', ai_response.lower())
+        if response_words is None:
+            response_words = _tokenize(ai_response)
+        # Extract keywords from context, counting repeats once per word
+        context_counts = Counter(_tokenize(context))
+        response_counts = Counter(response_words)
         
-        # Build associations
-        for ctx_word in context_keywords:
-            for resp_word in response_keywords:
-                self.context_associations[ctx_word][resp_word] += 1
+        # Build associations: each (ctx, resp) pair gains the product of counts
+        associations = self.context_associations
+        response_ids = [(self._word_id(word), count) for word, count in response_counts.items()]
+        for ctx_word, ctx_count in context_counts.items():
+            ctx_base = self._pair_key(self._word_id(ctx_word), 0)
+            for resp_id, resp_count in response_ids:
+                key = ctx_base | resp_id
+                associations[key] = associations.get(key, 0) + ctx_count * resp_count
     
-    def _update_response_database(self, user_input, ai_response):
+    def _update_response_database(self, user_input, ai_response, user_words=None):
         """Update the response database with new responses"""
+        if user_words is None:
+            user_words = _tokenize(user_input)
         # Categorize the response
-        category = self._categorize_input(user_input)
+        category = self._categorize_input(user_input, user_words)
         
         if category not in self.learned_responses["categories"]:
             self.learned_responses["categories"][category] = []
@@ -223,86 +753,194 @@ class LearningSystem:
         if ai_response not in self.learned_responses["categories"][category]:
             self.learned_responses["categories"][category].append(ai_response)
         
-        # Add to dynamic responses
-        self.learned_responses["dynamic_responses"].append({
+        # Add to dynamic responses; a full deque drops its oldest entry
+        dynamic = self.learned_responses["dynamic_responses"]
+        self._sync_response_index()
+        if len(dynamic) == dynamic.maxlen:
+            self._unindex_response(self._response_base)
+            self._response_base += 1
+        dynamic.append({
             "input": user_input,
             "response": ai_response,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "category": category
         })
-        
-        # Keep only recent dynamic responses
-        if len(self.learned_responses["dynamic_responses"]) > 1000:
-            self.learned_responses["dynamic_responses"] = self.learned_responses["dynamic_responses"][-1000:]
+        self._index_response(self._response_end, user_input, user_words)
+        self._response_end += 1
+        self._remember_response_bounds()
     
-    def _categorize_input(self, text):
+    def _build_response_index(self) -> None:
+        """Index dynamic responses by the words of their input.
+
+        Entries are identified by a running position (``_response_base`` is
+        the position of ``dynamic_responses[0]``), so evicting from the front
+        never renumbers the rest.
+        """
+        self._response_base = 0
+        self._response_end = 0
+        self._response_index: Dict[str, set] = defaultdict(set)
+        # Word set per entry: its size gives Jaccard straight from the
+        # index, and eviction unindexes it without re-tokenizing
+        self._response_tokens: Dict[int, frozenset] = {}
+        # First and last indexed entries, to notice changes made from outside
+        self._response_head = None
+        self._response_tail = None
+        self._sync_response_index()
+    
+    def _sync_response_index(self) -> None:
+        """Index entries appended to dynamic_responses since the last sync.
+
+        Any other change made from outside (an append that made a full deque
+        drop its oldest entry, a removal, a replaced list) moves entries away
+        from their positions, so the index is rebuilt instead.
+        """
+        dynamic = self.learned_responses["dynamic_responses"]
+        indexed = self._response_end - self._response_base
+        if indexed and (indexed > len(dynamic)
+                        or dynamic[0] is not self._response_head
+                        or dynamic[indexed - 1] is not self._response_tail):
+            self._build_response_index()
+            return
+        end = self._response_base + len(dynamic)
+        for position in range(self._response_end, end):
+            self._index_response(position, dynamic[position - self._response_base].get("input", ""))
+        self._response_end = end
+        self._remember_response_bounds()
+    
+    def _remember_response_bounds(self) -> None:
+        dynamic = self.learned_responses["dynamic_responses"]
+        if dynamic:
+            self._response_head = dynamic[0]
+            self._response_tail = dynamic[-1]
+    
+    def _index_response(self, position: int, text: str, words: Optional[List[str]] = None) -> None:
+        words = frozenset(_tokenize(text) if words is None else words)
+        for word in words:
+            self._response_index[word].add(position)
+        self._response_tokens[position] = words
+    
+    def _unindex_response(self, position: int) -> None:
+        for word in self._response_tokens.pop(position, ()):
+            positions = self._response_index.get(word)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del self._response_index[word]
+    
+    def _categorize_input(self, text, words=None):
         """Categorize input text"""
-        text_lower = text.lower()
+        if words is None:
+            words = _tokenize(text)
+        tokens = set(words)
         
         # Check for question words
-        question_words = ["what", "how", "why", "when", "where", "who", "which"]
-        if any(word in text_lower for word in question_words):
+        if tokens & _QUESTION_WORDS:
             return "question"
         
         # Check for greetings
-        greeting_words = ["hello", "hi", "hey", "greetings"]
-        if any(word in text_lower for word in greeting_words):
+        if tokens & _GREETING_WORDS:
             return "greeting"
         
         # Check for goodbyes
-        goodbye_words = ["bye", "goodbye", "see you", "farewell"]
-        if any(word in text_lower for word in goodbye_words):
+        if tokens & _GOODBYE_WORDS or ("see", "you") in zip(words, words[1:]):
             return "goodbye"
         
         # Check for compliments
-        compliment_words = ["good", "great", "awesome", "wonderful", "amazing"]
-        if any(word in text_lower for word in compliment_words):
+        if tokens & _COMPLIMENT_WORDS:
             return "compliment"
         
         # Check for complaints
-        complaint_words = ["bad", "terrible", "awful", "horrible"]
-        if any(word in text_lower for word in complaint_words):
+        if tokens & _COMPLAINT_WORDS:
             return "complaint"
         
         return "general"
     
     def get_learned_response(self, user_input, context=None):
-        """Get a learned response based on input and context"""
+        """Get a learned response based on input and context.
+
+        Dynamic responses are scored when they share a word with the input.
+        Only if none does are all of them scored on characters alone, which
+        still finds typos such as "helo" for "hello".
+        """
         # Check for exact or similar responses
-        category = self._categorize_input(user_input)
+        input_text = user_input.lower()
+        input_tokens = _WORD_RE.findall(input_text)
+        category = self._categorize_input(user_input, input_tokens)
         
         # Prefer category-matched canned responses first
         if category in self.learned_responses["categories"]:
             responses = self.learned_responses["categories"][category]
             if responses:
-                import random
-                return random.choice(responses)
+                return self._rng.choice(responses)
 
         # Improved similarity matching using SequenceMatcher + Jaccard
-        input_text = user_input.lower()
-        input_words = set(re.findall(r'\b\w+\b', input_text))
+        input_words = set(input_tokens)
 
         best_match = None
         best_score = 0.0
+        best_position = -1
+
+        # Entries sharing a word with the input are scored first. Without
+        # any shared word the Jaccard term is 0, and the character ratio
+        # alone would have to exceed 0.75 to pass the threshold.
+        self._sync_response_index()
+        dynamic = self.learned_responses["dynamic_responses"]
+        index = self._response_index
+        shared = Counter()
+        for word in input_words:
+            shared.update(index.get(word, ()))
+
+        # Jaccard on word sets, from shared-word counts and stored set sizes
+        tokens = self._response_tokens
+        ranked = sorted(
+            ((count / (len(input_words) + len(tokens[position]) - count), position)
+             for position, count in shared.items()),
+            key=lambda item: (-item[0], item[1])
+        )
+        if not ranked:
+            # No shared word at all: fall back to a character-only scan of
+            # the (bounded) deque, front to back; the quick ratios below
+            # skip most entries cheaply
+            ranked = [(0.0, position) for position in range(self._response_base, self._response_end)]
+
+        def can_win(score_bound: float, position: int) -> bool:
+            # Ties go to the earliest entry, as in a front-to-back scan
+            if score_bound <= 0.45:  # Tunable threshold
+                return False
+            return score_bound > best_score or (score_bound == best_score and position < best_position)
+
+        matcher = difflib.SequenceMatcher(None, input_text)
+        # The quick ratios are symmetric in their two strings. Giving the
+        # input as seq2 here means its character index and counts are built
+        # once, instead of once per candidate by set_seq2 on `matcher`.
+        bounds = difflib.SequenceMatcher(None, "", input_text)
+        for jaccard, position in ranked:
+            # Candidates come in falling Jaccard order; once even a perfect
+            # string match cannot reach the best score, none later can
+            if 0.6 + 0.4 * jaccard < best_score:
+                break
+            if not can_win(0.6 + 0.4 * jaccard, position):
+                continue
 
-        for resp_data in self.learned_responses.get("dynamic_responses", []):
-            resp_input = resp_data.get("input", "").lower()
-            resp_text = resp_input
-            # String similarity
-            seq_ratio = difflib.SequenceMatcher(None, input_text, resp_text).ratio()
+            resp_data = dynamic[position - self._response_base]
+            resp_text = resp_data.get("input", "").lower()
 
-            # Jaccard on word sets
-            resp_words = set(re.findall(r'\b\w+\b', resp_text))
-            union = input_words.union(resp_words)
-            jaccard = 0.0
-            if union:
-                jaccard = len(input_words.intersection(resp_words)) / len(union)
+            # String similarity. The quick ratios are cheap upper bounds on
+            # ratio(); skip the full match when even they cannot win.
+            bounds.set_seq1(resp_text)
+            if not can_win(0.6 * bounds.real_quick_ratio() + 0.4 * jaccard, position):
+                continue
+            if not can_win(0.6 * bounds.quick_ratio() + 0.4 * jaccard, position):
+                continue
+            matcher.set_seq2(resp_text)
+            seq_ratio = matcher.ratio()
 
             # Combine signals (weights chosen conservatively)
             score = 0.6 * seq_ratio + 0.4 * jaccard
 
-            if score > best_score and score > 0.45:  # Tunable threshold
+            if can_win(score, position):
                 best_score = score
+                best_position = position
                 best_match = resp_data.get("response")
 
         return best_match
@@ -312,11 +950,7 @@ class LearningSystem:
         return {
             "total_words": len(self.vocabulary["words"]),
             "total_phrases": len(self.vocabulary["phrases"]),
-            "most_common_words": sorted(
-                self.vocabulary["frequency"].items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:10],
+            "most_common_words": self.vocabulary["frequency"].most_common(10),
             "total_patterns": len(self.patterns["input_patterns"]),
             "total_responses": len(self.learned_responses["dynamic_responses"])
         }
@@ -352,7 +986,7 @@ class LearningSystem:
         # Ensure vocabulary structures
         if word not in self.vocabulary["words"]:
             self.vocabulary["words"][word] = {
-                "first_seen": datetime.now().isoformat(),
+                "first_seen": _now_iso(),
                 "contexts": [],
                 "translations": {}
             }
@@ -395,7 +1029,7 @@ class LearningSystem:
         # Ensure the word exists
         if word not in self.vocabulary["words"]:
             self.vocabulary["words"][word] = {
-                "first_seen": datetime.now().isoformat(),
+                "first_seen": _now_iso(),
                 "contexts": [],
                 "translations": {}
             }
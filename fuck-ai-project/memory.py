@@ -1,14 +1,34 @@
 """Simple persistent conversation memory manager.
 
 Provides a tiny API to add/retrieve recent conversation entries
-and persist them under `data/memory.json`.
+and persist them under `data/memory.ndjson`, one JSON entry per line.
 """
 
 from datetime import datetime
-from typing import List, Dict
+from typing import BinaryIO, List, Dict, Optional
+import atexit
 import json
 import os
 
+try:
+    import orjson
+except ImportError:  # optional, faster JSON
+    orjson = None
+
+
+def _dumps_line(entry: Dict[str, str]) -> bytes:
+    """Encode one entry as a newline-terminated UTF-8 JSON line."""
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class MemoryManager:
     """Centralized memory manager for conversation history.
@@ -18,35 +38,97 @@ class MemoryManager:
     - `get_recent(n)` return most recent `n` entries
     - `clear()` wipe memory
     - `to_list()` return full list
+    - `close()` release the append handle (also run at exit)
     """
 
     def __init__(self, data_dir: str = "data", max_items: int = 100) -> None:
         self.data_dir = data_dir
-        self.memory_file = os.path.join(data_dir, "memory.json")
+        self.memory_file = os.path.join(data_dir, "memory.ndjson")
+        # Older versions rewrote a single JSON list on every add
+        self.legacy_memory_file = os.path.join(data_dir, "memory.json")
         self.max_items = int(max_items)
         os.makedirs(self.data_dir, exist_ok=True)
 
+        # Append handle kept open across adds; reopened after each rewrite
+        self._fh: Optional[BinaryIO] = None
         self._memory: List[Dict[str, str]] = self._load()
+        self._open()
+        atexit.register(self.close)
+
+    def _open(self) -> None:
+        try:
+            self._fh = open(self.memory_file, "ab")
+        except Exception:
+            self._fh = None
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
 
     def _load(self) -> List[Dict[str, str]]:
+        # Lines on disk, including ones trimmed from memory but not yet rotated
+        self._file_lines = 0
         if not os.path.exists(self.memory_file):
+            return self._load_legacy()
+        entries: List[Dict[str, str]] = []
+        try:
+            with open(self.memory_file, "rb") as fh:
+                for line in fh:
+                    self._file_lines += 1
+                    try:
+                        entries.append(_loads(line))
+                    except ValueError:
+                        continue  # torn write at the tail
+        except Exception:
+            return []
+        return entries[-self.max_items :]
+
+    def _load_legacy(self) -> List[Dict[str, str]]:
+        """Import a pre-NDJSON memory.json, rewriting it in the new format."""
+        if not os.path.exists(self.legacy_memory_file):
             return []
         try:
-            with open(self.memory_file, "r", encoding="utf-8") as fh:
-                data = json.load(fh)
-            if isinstance(data, list):
-                return data
+            with open(self.legacy_memory_file, "rb") as fh:
+                data = _loads(fh.read())
         except Exception:
-            pass
-        return []
+            return []
+        if not isinstance(data, list):
+            return []
+        self._memory = data[-self.max_items :]
+        self._save()
+        return self._memory
 
     def _save(self) -> None:
+        """Rewrite the whole file with the retained entries."""
+        reopen = self._fh is not None
+        self.close()
         try:
-            with open(self.memory_file, "w", encoding="utf-8") as fh:
-                json.dump(self._memory[-self.max_items :], fh, ensure_ascii=False, indent=2)
+            entries = self._memory[-self.max_items :]
+            payload = b"".join(_dumps_line(entry) for entry in entries)
+            with open(self.memory_file, "wb") as fh:
+                fh.write(payload)
+            self._file_lines = len(entries)
         except Exception:
             # Best-effort persistence; don't raise for UI flows
             pass
+        if reopen:
+            self._open()
+
+    def _append(self, entry: Dict[str, str]) -> None:
+        """Append one entry; rotate once the file holds 1.5x max_items lines."""
+        if self._fh is None:
+            return
+        try:
+            # One write per entry, flushed so each turn reaches the file
+            self._fh.write(_dumps_line(entry))
+            self._fh.flush()
+            self._file_lines += 1
+        except Exception:
+            # Best-effort persistence; don't raise for UI flows
+            return
+        if self._file_lines > self.max_items * 1.5:
+            self._save()
 
     def add(self, user: str, neuro: str) -> None:
         """Append a user/neuro exchange to memory and persist."""
@@ -58,8 +140,8 @@ class MemoryManager:
         self._memory.append(entry)
         # trim
         if len(self._memory) > self.max_items:
-            self._memory = self._memory[-self.max_items :]
-        self._save()
+            del self._memory[: -self.max_items]
+        self._append(entry)
 
     def get_recent(self, n: int = 10) -> List[Dict[str, str]]:
         return list(self._memory[-int(n) :])
@@ -7,14 +7,144 @@ endpoints for translations.
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
+import random
 import re
-from typing import Dict, Optional
+import string
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON
+    orjson = None
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+
+# Words are runs of anything but whitespace and punctuation. Plain \w+ is
+# not used because it splits Devanagari words at their vowel signs.
+_PUNCTUATION = string.punctuation + '¡¿«»“”‘’…–—。、，！？；：।'
+_WORD_RE = re.compile('[^\\s' + re.escape(_PUNCTUATION) + ']+')
+
+# Scripts written without spaces between words; their keywords are found
+# inside tokens instead of being matched as whole tokens
+_UNSPACED_LANGUAGES = frozenset({'japanese', 'chinese', 'korean'})
+
+# Keywords used to pick the type of a template response
+_POSITIVE_WORDS = frozenset(['good', 'great', 'awesome', 'wonderful', 'amazing', 'love', 'like', 'happy', 'excited'])
+_QUESTION_WORDS = frozenset(['what', 'how', 'why', 'when', 'where', 'who', 'which'])
+
+# A translation service that fails this many times in a row is skipped
+# for the cooldown period
+_SERVICE_MAX_FAILURES = 3
+_SERVICE_COOLDOWN = 60.0
+
+# Only the most recent patterns are kept per language and response type
+_MAX_PATTERNS_PER_TYPE = 100
+
+# Dirty data files are written at most this often, or after this many changes
+_FLUSH_INTERVAL = 5.0
+_FLUSH_EVERY = 100
+
+
+def _read_json(path):
+    """Read and parse a UTF-8 JSON file, with orjson when available."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _write_json(path, obj, indent=True):
+    """Atomically write `obj` as UTF-8 JSON via a temp file and rename."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        payload = orjson.dumps(obj, option=option)
+    else:
+        payload = json.dumps(obj, ensure_ascii=False, indent=2 if indent else None,
+                             separators=None if indent else (',', ':')).encode('utf-8')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+# Greetings in different languages
+_GREETINGS: Dict[str, Tuple[str, ...]] = {
+    'english': ('Hello! I\'m Kiki, your multilingual AI companion!', 'Hi there! Ready to chat in any language?'),
+    'spanish': ('¡Hola! Soy Kiki, tu compañera AI multilingüe!', '¡Hola! ¿Listos para chatear en cualquier idioma?'),
+    'french': ('Bonjour! Je suis Kiki, votre compagnon IA multilingue!', 'Salut! Prêt à discuter dans n\'importe quelle langue?'),
+    'german': ('Hallo! Ich bin Kiki, dein mehrsprachiger KI-Begleiter!', 'Hallo! Bereit, in jeder Sprache zu chatten?'),
+    'italian': ('Ciao! Sono Kiki, il tuo compagno AI multilingue!', 'Ciao! Pronto a chattare in qualsiasi lingua?'),
+    'portuguese': ('Olá! Eu sou Kiki, sua companheira de IA multilíngue!', 'Oi! Pronto para conversar em qualquer idioma?'),
+    'japanese': ('こんにちは！私はキキ、あなたの多言語AIコンパニオンです！', 'こんにちは！どんな言語でもチャットする準備はできていますか？'),
+    'chinese': ('你好！我是Kiki，你的多语言AI伙伴！', '你好！准备好用任何语言聊天了吗？'),
+    'korean': ('안녕하세요! 저는 키키, 당신의 다국어 AI 동반자입니다!', '안녕하세요! 어떤 언어로든 채팅할 준비가 되셨나요?'),
+    'russian': ('Привет! Я Кики, ваш многоязычный ИИ-компаньон!', 'Привет! Готов общаться на любом языке?'),
+    'arabic': ('مرحبا! أنا كيكي، رفيقك الذكي متعدد اللغات!', 'مرحبا! مستعد للدردشة بأي لغة؟'),
+    'hindi': ('नमस्ते! मैं किकी हूँ, आपका बहुभाषी AI साथी!', 'नमस्ते! किसी भी भाषा में चैट करने के लिए तैयार हैं?')
+}
+
+# Canned replies per language and response type
+_TEMPLATES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    'english': {
+        'acknowledgment': ("I understand!", "Got it!", "That makes sense!"),
+        'curiosity': ("Tell me more!", "That's interesting!", "How fascinating!"),
+        'encouragement': ("Great job!", "Well done!", "Excellent!")
+    },
+    'spanish': {
+        'acknowledgment': ("¡Entiendo!", "¡Entendido!", "¡Tiene sentido!"),
+        'curiosity': ("¡Cuéntame más!", "¡Qué interesante!", "¡Qué fascinante!"),
+        'encouragement': ("¡Buen trabajo!", "¡Bien hecho!", "¡Excelente!")
+    },
+    'french': {
+        'acknowledgment': ("Je comprends!", "Compris!", "C'est logique!"),
+        'curiosity': ("Dites-moi plus!", "C'est intéressant!", "Comme c'est fascinant!"),
+        'encouragement': ("Bon travail!", "Bien fait!", "Excellent!")
+    },
+    'german': {
+        'acknowledgment': ("Ich verstehe!", "Verstanden!", "Das macht Sinn!"),
+        'curiosity': ("Erzähl mir mehr!", "Das ist interessant!", "Wie faszinierend!"),
+        'encouragement': ("Gute Arbeit!", "Gut gemacht!", "Ausgezeichnet!")
+    },
+    'japanese': {
+        'acknowledgment': ("分かりました！", "理解しました！", "なるほど！"),
+        'curiosity': ("もっと教えて！", "興味深いです！", "面白いですね！"),
+        'encouragement': ("よくできました！", "素晴らしい！", "優秀です！")
+    },
+    'chinese': {
+        'acknowledgment': ("我明白了！", "理解了！", "有道理！"),
+        'curiosity': ("告诉我更多！", "很有趣！", "太迷人了！"),
+        'encouragement': ("做得好！", "干得好！", "优秀！")
+    }
+}
+
+
+@dataclass(frozen=True)
+class NormalizedInput:
+    """An input string with its case-folded form and tokens derived once."""
+    text: str
+    lower: str
+    tokens: Tuple[str, ...]
+    token_set: FrozenSet[str]
+    
+    @classmethod
+    def from_text(cls, text: Union[str, "NormalizedInput"]) -> "NormalizedInput":
+        if isinstance(text, NormalizedInput):
+            return text
+        lower = text.casefold()
+        tokens = tuple(_WORD_RE.findall(lower))
+        return cls(text, lower, tokens, frozenset(tokens))
+
 
 class MultilingualSystem:
     def __init__(self, data_dir="data"):
@@ -41,33 +171,51 @@ class MultilingualSystem:
             'arabic': ['مرحبا', 'كيف', 'ما', 'متى', 'أين', 'لماذا', 'في', 'على', 'من', 'إلى', 'أنت', 'أنا'],
             'hindi': ['नमस्ते', 'कैसे', 'क्या', 'कब', 'कहाँ', 'क्यों', 'और', 'है', 'हैं', 'आप', 'मैं']
         }
+        self._build_keyword_index()
         
-        # Common greetings in different languages
-        self.greetings = {
-            'english': ['Hello! I\'m Kiki, your multilingual AI companion!', 'Hi there! Ready to chat in any language?'],
-            'spanish': ['¡Hola! Soy Kiki, tu compañera AI multilingüe!', '¡Hola! ¿Listos para chatear en cualquier idioma?'],
-            'french': ['Bonjour! Je suis Kiki, votre compagnon IA multilingue!', 'Salut! Prêt à discuter dans n\'importe quelle langue?'],
-            'german': ['Hallo! Ich bin Kiki, dein mehrsprachiger KI-Begleiter!', 'Hallo! Bereit, in jeder Sprache zu chatten?'],
-            'italian': ['Ciao! Sono Kiki, il tuo compagno AI multilingue!', 'Ciao! Pronto a chattare in qualsiasi lingua?'],
-            'portuguese': ['Olá! Eu sou Kiki, sua companheira de IA multilíngue!', 'Oi! Pronto para conversar em qualquer idioma?'],
-            'japanese': ['こんにちは！私はキキ、あなたの多言語AIコンパニオンです！', 'こんにちは！どんな言語でもチャットする準備はできていますか？'],
-            'chinese': ['你好！我是Kiki，你的多语言AI伙伴！', '你好！准备好用任何语言聊天了吗？'],
-            'korean': ['안녕하세요! 저는 키키, 당신의 다국어 AI 동반자입니다!', '안녕하세요! 어떤 언어로든 채팅할 준비가 되셨나요?'],
-            'russian': ['Привет! Я Кики, ваш многоязычный ИИ-компаньон!', 'Привет! Готов общаться на любом языке?'],
-            'arabic': ['مرحبا! أنا كيكي، رفيقك الذكي متعدد اللغات!', 'مرحبا! مستعد للدردشة بأي لغة؟'],
-            'hindi': ['नमस्ते! मैं किकी हूँ, आपका बहुभाषी AI साथी!', 'नमस्ते! किसी भी भाषा में चैट करने के लिए तैयार हैं?']
-        }
+        # Per-instance RNG for picking canned replies
+        self._rng = random.Random()
+        
+        # Keep-alive session shared by all translation requests
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2,
+                              status_forcelist=(502, 503, 504),
+                              allowed_methods=frozenset({'POST'})),
+        )
+        self._http.mount('https://', adapter)
+        self._http.headers.update({'Content-Type': 'application/json', 'User-Agent': 'kiki/1.0'})
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='translate')
+        
+        # Consecutive failures and skip-until deadlines per service URL
+        self._service_failures = defaultdict(int)
+        self._service_penalty = {}
+        
+        # Least recently used translations are evicted beyond this many
+        self.max_translations = 10_000
         
         # Initialize language data
         self.supported_languages = self.load_languages()
         self.translations = self.load_translations()
         self.language_patterns = self.load_language_patterns()
+        
+        # Write-behind state: names of changed files and changes since last flush
+        self._dirty = set()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        atexit.register(self._maybe_flush, force=True)
+    
+    @property
+    def greetings(self) -> Dict[str, Tuple[str, ...]]:
+        """Greetings in different languages."""
+        return _GREETINGS
     
     def load_languages(self) -> Dict:
         """Load supported languages configuration."""
         if os.path.exists(self.languages_file):
-            with open(self.languages_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_json(self.languages_file)
         return {
             'supported': list(self.language_keywords.keys()),
             'default': 'english',
@@ -76,47 +224,119 @@ class MultilingualSystem:
         }
     
     def load_translations(self) -> Dict:
-        """Load translation cache."""
+        """Load translation cache, keyed by (text, source, target)."""
+        translations = OrderedDict()
         if os.path.exists(self.translations_file):
-            with open(self.translations_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+            for key, value in _read_json(self.translations_file).items():
+                parts = key.rsplit('|', 2)
+                if len(parts) != 3 or '_' in parts[1] or '_' in parts[2]:
+                    # Legacy "text_source_target" key
+                    parts = key.rsplit('_', 2)
+                translations[tuple(parts)] = value
+        # The file is written oldest first, so trim from the front
+        while len(translations) > self.max_translations:
+            translations.popitem(last=False)
+        return translations
     
     def load_language_patterns(self):
         """Load language-specific patterns."""
+        patterns = defaultdict(lambda: defaultdict(lambda: deque(maxlen=_MAX_PATTERNS_PER_TYPE)))
         if os.path.exists(self.language_patterns_file):
-            with open(self.language_patterns_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return defaultdict(lambda: defaultdict(list))
+            for lang, by_type in _read_json(self.language_patterns_file).items():
+                for response_type, pattern_list in by_type.items():
+                    patterns[lang][response_type].extend(pattern_list)
+        return patterns
     
     def save_all_data(self):
         """Save all multilingual data"""
-        with open(self.languages_file, 'w', encoding='utf-8') as f:
-            json.dump(self.supported_languages, f, ensure_ascii=False, indent=2)
+        self._dirty.update(('languages', 'translations', 'patterns'))
+        self._maybe_flush(force=True)
+    
+    def _mark_dirty(self, name: str) -> None:
+        """Record a change to one data file and flush if one is due."""
+        self._dirty.add(name)
+        self._pending += 1
+        self._maybe_flush()
+    
+    def _maybe_flush(self, force: bool = False) -> None:
+        """Write the dirty data files once enough time or changes have accrued."""
+        if not self._dirty:
+            return
+        if (not force and self._pending < _FLUSH_EVERY
+                and time.monotonic() - self._last_flush < _FLUSH_INTERVAL):
+            return
         
-        with open(self.translations_file, 'w', encoding='utf-8') as f:
-            json.dump(self.translations, f, ensure_ascii=False, indent=2)
+        # The translation cache is machine-only, so it is written compactly
+        files = {
+            'languages': (self.languages_file, self.supported_languages, True),
+            'translations': (self.translations_file,
+                             {'|'.join(key): value for key, value in self.translations.items()},
+                             False),
+            'patterns': (self.language_patterns_file,
+                         {lang: {response_type: list(pattern_list)
+                                 for response_type, pattern_list in by_type.items()}
+                          for lang, by_type in self.language_patterns.items()},
+                         True),
+        }
+        for name in self._dirty:
+            _write_json(*files[name])
+        self._dirty.clear()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+    
+    def _build_keyword_index(self) -> None:
+        """Index the detection keywords for single-pass matching.
         
-        with open(self.language_patterns_file, 'w', encoding='utf-8') as f:
-            json.dump(dict(self.language_patterns), f, ensure_ascii=False, indent=2)
+        Keywords of space-delimited languages map whole tokens to their
+        languages; keywords of unspaced scripts go into a character trie
+        that is walked from every position of a token.
+        """
+        self._token_keywords = defaultdict(list)
+        self._keyword_trie = {}
+        for lang, keywords in self.language_keywords.items():
+            for keyword in keywords:
+                if lang in _UNSPACED_LANGUAGES:
+                    node = self._keyword_trie
+                    for char in keyword:
+                        node = node.setdefault(char, {})
+                    node.setdefault(None, []).append((lang, keyword))
+                else:
+                    self._token_keywords[keyword].append((lang, keyword))
     
-    def detect_language(self, text: str) -> str:
+    def detect_language(self, text: Union[str, NormalizedInput]) -> str:
         """Detect the language of input text."""
-        if not text.strip():
+        tokens = NormalizedInput.from_text(text).tokens
+        if not tokens:
             return self.supported_languages['default']
         
-        text_lower = text.lower()
-        language_scores = {}
+        # Collect each matched (language, keyword) pair once
+        hits = set()
+        trie = self._keyword_trie
+        for token in tokens:
+            hits.update(self._token_keywords.get(token, ()))
+            if token.isascii():
+                continue
+            for start in range(len(token)):
+                node = trie.get(token[start])
+                pos = start + 1
+                while node is not None:
+                    if None in node:
+                        hits.update(node[None])
+                    if pos == len(token):
+                        break
+                    node = node.get(token[pos])
+                    pos += 1
         
-        for lang, keywords in self.language_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
-            
-            # Normalize score by text length
-            if len(text.split()) > 0:
-                language_scores[lang] = score / len(text.split())
+        # Normalize score by text length. Scores are filled in
+        # language_keywords order so that max() breaks ties the same way
+        # on every run, whatever order the hit set iterates in.
+        hit_counts = defaultdict(int)
+        for lang, _ in hits:
+            hit_counts[lang] += 1
+        language_scores = {
+            lang: hit_counts[lang] / len(tokens)
+            for lang in self.language_keywords if lang in hit_counts
+        }
         
         # Return language with highest score, or default if no clear match
         if language_scores:
@@ -128,17 +348,21 @@ class MultilingualSystem:
     
     def translate_text(self, text: str, target_language: str, source_language: str = 'auto') -> str:
         """Translate text using online service or cache."""
+        if source_language == target_language:
+            return text
+        
         # Check cache first
-        cache_key = f"{text}_{source_language}_{target_language}"
+        cache_key = (text, source_language, target_language)
         if cache_key in self.translations:
+            self.translations.move_to_end(cache_key)
             return self.translations[cache_key]
         
         # Try to translate using LibreTranslate (free service)
         try:
             response = self.translate_with_libretranslate(text, target_language, source_language)
             if response:
-                self.translations[cache_key] = response
-                self.save_all_data()
+                self._cache_translation(cache_key, response)
+                self._mark_dirty('translations')
                 return response
         except Exception as e:
             print(f"Translation error: {e}")
@@ -146,6 +370,50 @@ class MultilingualSystem:
         # Fallback: return original text
         return text
     
+    def translate_many(self, texts: Iterable[str], target_language: str,
+                       source_language: str = 'auto') -> List[str]:
+        """Translate several strings, requesting all cache misses concurrently."""
+        texts = list(texts)
+        if source_language == target_language:
+            return texts
+        
+        found = {}
+        for text in texts:
+            key = (text, source_language, target_language)
+            if key in self.translations:
+                self.translations.move_to_end(key)
+                found[text] = self.translations[key]
+        missing = set(texts) - found.keys()
+        
+        if missing:
+            futures = {
+                text: self._executor.submit(self.translate_with_libretranslate,
+                                            text, target_language, source_language)
+                for text in missing
+            }
+            for text, future in futures.items():
+                try:
+                    response = future.result()
+                except Exception as e:
+                    print(f"Translation error: {e}")
+                    continue
+                if response:
+                    found[text] = response
+                    self._cache_translation((text, source_language, target_language), response)
+            
+            if found.keys() & missing:
+                self._mark_dirty('translations')
+        
+        # Fall back to the original text for anything left untranslated
+        return [found.get(text, text) for text in texts]
+    
+    def _cache_translation(self, key: Tuple[str, str, str], value: str) -> None:
+        """Insert a translation, evicting the least recently used one when full."""
+        self.translations[key] = value
+        self.translations.move_to_end(key)
+        if len(self.translations) > self.max_translations:
+            self.translations.popitem(last=False)
+    
     def translate_with_libretranslate(self, text: str, target_lang: str, source_lang: str = 'auto') -> Optional[str]:
         """Use LibreTranslate API for translation."""
         # Convert our language codes to LibreTranslate codes
@@ -164,112 +432,86 @@ class MultilingualSystem:
             'https://libretranslate.com/translate'
         ]
         
+        data = {
+            'q': text,
+            'source': source_code,
+            'target': target_code,
+            'format': 'text'
+        }
+        
         for service_url in services:
+            # Skip services that keep failing until their cooldown is over
+            if self._service_penalty.get(service_url, 0) > time.monotonic():
+                continue
             try:
-                data = {
-                    'q': text,
-                    'source': source_code,
-                    'target': target_code,
-                    'format': 'text'
-                }
-                
-                response = requests.post(service_url, json=data, timeout=10)
+                response = self._http.post(service_url, json=data, timeout=10)
                 if response.status_code == 200:
+                    self._service_failures.pop(service_url, None)
                     result = response.json()
                     return result.get('translatedText', text)
-            except:
-                continue
+            except Exception:
+                pass
+            
+            self._service_failures[service_url] += 1
+            if self._service_failures[service_url] >= _SERVICE_MAX_FAILURES:
+                self._service_penalty[service_url] = time.monotonic() + _SERVICE_COOLDOWN
+                self._service_failures[service_url] = 0
         
         return None
     
     def get_greeting(self, language: str = 'english') -> str:
         """Get greeting in specified language."""
         if language in self.greetings:
-            import random
-            return random.choice(self.greetings[language])
+            return self._rng.choice(self.greetings[language])
         return self.greetings['english'][0]
     
-    def learn_language_pattern(self, text: str, language: str, response_type: str = 'general') -> None:
+    def learn_language_pattern(self, text: Union[str, NormalizedInput], language: str,
+                               response_type: str = 'general') -> None:
         """Learn language-specific patterns."""
-        # Extract patterns from text
-        words = re.findall(r'\b\w+\b', text.lower())
+        ni = NormalizedInput.from_text(text)
         
         # Store pattern
         pattern_data = {
-            'text': text,
-            'words': words,
+            'text': ni.text,
+            'words': list(ni.tokens),
             'timestamp': datetime.now().isoformat(),
             'type': response_type
         }
         
+        # The bounded deque keeps only the most recent patterns per type
         self.language_patterns[language][response_type].append(pattern_data)
         
-        # Keep only recent patterns (last 100 per type)
-        if len(self.language_patterns[language][response_type]) > 100:
-            self.language_patterns[language][response_type] = self.language_patterns[language][response_type][-100:]
+        self._mark_dirty('patterns')
     
-    def get_language_appropriate_response(self, text: str, detected_language: str) -> Optional[str]:
+    def get_language_appropriate_response(self, text: Union[str, NormalizedInput],
+                                          detected_language: str) -> Optional[str]:
         """Get culturally appropriate response for the language."""
-        # Basic response templates for different languages
-        templates = {
-            'english': {
-                'acknowledgment': ["I understand!", "Got it!", "That makes sense!"],
-                'curiosity': ["Tell me more!", "That's interesting!", "How fascinating!"],
-                'encouragement': ["Great job!", "Well done!", "Excellent!"]
-            },
-            'spanish': {
-                'acknowledgment': ["¡Entiendo!", "¡Entendido!", "¡Tiene sentido!"],
-                'curiosity': ["¡Cuéntame más!", "¡Qué interesante!", "¡Qué fascinante!"],
-                'encouragement': ["¡Buen trabajo!", "¡Bien hecho!", "¡Excelente!"]
-            },
-            'french': {
-                'acknowledgment': ["Je comprends!", "Compris!", "C'est logique!"],
-                'curiosity': ["Dites-moi plus!", "C'est intéressant!", "Comme c'est fascinant!"],
-                'encouragement': ["Bon travail!", "Bien fait!", "Excellent!"]
-            },
-            'german': {
-                'acknowledgment': ["Ich verstehe!", "Verstanden!", "Das macht Sinn!"],
-                'curiosity': ["Erzähl mir mehr!", "Das ist interessant!", "Wie faszinierend!"],
-                'encouragement': ["Gute Arbeit!", "Gut gemacht!", "Ausgezeichnet!"]
-            },
-            'japanese': {
-                'acknowledgment': ["分かりました！", "理解しました！", "なるほど！"],
-                'curiosity': ["もっと教えて！", "興味深いです！", "面白いですね！"],
-                'encouragement': ["よくできました！", "素晴らしい！", "優秀です！"]
-            },
-            'chinese': {
-                'acknowledgment': ["我明白了！", "理解了！", "有道理！"],
-                'curiosity': ["告诉我更多！", "很有趣！", "太迷人了！"],
-                'encouragement': ["做得好！", "干得好！", "优秀！"]
-            }
-        }
-        
         # Get templates for detected language or fall back to English
-        lang_templates = templates.get(detected_language, templates['english'])
+        lang_templates = _TEMPLATES.get(detected_language, _TEMPLATES['english'])
         
         # Simple sentiment analysis to choose appropriate response type
-        positive_words = ['good', 'great', 'awesome', 'wonderful', 'amazing', 'love', 'like', 'happy', 'excited']
-        question_words = ['what', 'how', 'why', 'when', 'where', 'who', 'which', '?']
-        
-        text_lower = text.lower()
+        ni = NormalizedInput.from_text(text)
         
-        if any(word in text_lower for word in question_words):
+        if '?' in ni.text or not ni.token_set.isdisjoint(_QUESTION_WORDS):
             return None  # Let the main AI handle questions
-        elif any(word in text_lower for word in positive_words):
-            import random
-            return random.choice(lang_templates['encouragement'])
+        elif not ni.token_set.isdisjoint(_POSITIVE_WORDS):
+            return self._rng.choice(lang_templates['encouragement'])
         else:
-            import random
-            return random.choice(lang_templates['acknowledgment'])
+            return self._rng.choice(lang_templates['acknowledgment'])
     
-    def process_multilingual_input(self, text: str, target_language: Optional[str] = None) -> Dict:
+    def process_multilingual_input(self, text: Union[str, NormalizedInput],
+                                   target_language: Optional[str] = None) -> Dict:
         """Process input text with multilingual support."""
+        # Lowercase and tokenize once for every step below
+        ni = NormalizedInput.from_text(text)
+        text = ni.text
+        
         # Detect language
-        detected_language = self.detect_language(text)
+        detected_language = self.detect_language(ni)
         
         # Learn from this input
         if self.supported_languages.get('learning_enabled', True):
-            self.learn_language_pattern(text, detected_language)
+            self.learn_language_pattern(ni, detected_language)
         
         # If target language is specified and different from detected, translate
         if target_language and target_language != detected_language:
@@ -8,18 +8,19 @@ def install_requirements():
         'requests',
         'colorama',  # For colored terminal output
         'urllib3',   # For URL parsing
-        'hashlib',   # For generating hashes (usually built-in)
+        'orjson',    # Faster JSON (optional at runtime, as in requirements.txt)
     ]
     
     print("Installing required Python packages...")
-    for package in requirements:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            print(f"✅ {package} installed successfully")
-        except subprocess.CalledProcessError:
-            print(f"❌ Failed to install {package}")
-            return False
+    # One pip run resolves everything together instead of once per package
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install",
+                               "--disable-pip-version-check", "--no-input", *requirements])
+    except subprocess.CalledProcessError:
+        print(f"❌ Failed to install {', '.join(requirements)}")
+        return False
     
+    print(f"✅ {', '.join(requirements)} installed successfully")
     return True
 
 def download_ai_model():
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+
+from learning_system import LearningSystem, _WordTable
+
+
+def test_legacy_vocabulary_with_names_word():
+    """A legacy vocabulary.json that learned the word "names" still loads."""
+    data_dir = tempfile.mkdtemp()
+    legacy = {
+        "words": {
+            "names": {"first_seen": "2024-01-02T03:04:05", "contexts": []},
+            "hello": {"first_seen": "2024-01-02T03:04:05", "contexts": []},
+            "computer": {"first_seen": "2024-01-02T03:04:05", "contexts": [],
+                         "definition": "A machine"},
+        },
+        "phrases": {"hello there": {"frequency": 3, "contexts": []}},
+        "sentiment": {},
+        "frequency": {"names": 2, "hello": 5, "computer": 1},
+    }
+    with open(os.path.join(data_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    ls = LearningSystem(data_dir)
+    words = ls.vocabulary["words"]
+    assert set(words) == {"names", "hello", "computer"}
+    assert words["names"]["first_seen"] == "2024-01-02T03:04:05"
+    assert words["computer"]["definition"] == "A machine"
+    assert ls.vocabulary["phrases"] == {"hello there": 3}
+
+    # The compact form written back reloads to the same words
+    table = _WordTable.from_json(json.loads(json.dumps(words.to_json())))
+    assert set(table) == {"names", "hello", "computer"}
+    assert table["computer"]["definition"] == "A machine"
+    ls.close()
+
+
+def test_iterating_reads_every_word():
+    """items() and values() expand compact words while iterating."""
+    table = _WordTable()
+    table.add_new(["alpha", "beta", "gamma"], 1700000000)
+    table["delta"] = {"first_seen": "2024-01-02T03:04:05", "contexts": ["x"]}
+
+    expanded = dict(table.items())
+    assert set(expanded) == {"alpha", "beta", "gamma", "delta"}
+    assert len(list(table.values())) == len(table) == 4
+
+
+if __name__ == "__main__":
+    test_legacy_vocabulary_with_names_word()
+    test_iterating_reads_every_word()
+    print("Word table tests passed")